@@ -18,4 +18,4 @@
 
 # <pep8 compliant>
 
-__all__ = ["idref", "base", "param", "category"]
+__all__ = ["idref", "base", "param", "category", "execution", "batch", "cache", "scheduler", "profiling", "serialize", "compiler", "background", "topology"]
@@ -0,0 +1,324 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""Evaluation of node trees on a background thread.
+
+Unlinked input values and IDRefs are read on the main thread when an
+evaluation starts. Nodes are then executed on a worker thread, except for
+nodes with execute_policy 'MAIN': these may access RNA data, so their execute
+calls are sent to the main thread through a MainThreadQueue and the worker
+waits for the result.
+
+The main thread has to poll the evaluator regularly. By default it registers
+itself with bpy.app.timers, headless code can use a HeadlessLoop instead:
+
+    loop = HeadlessLoop()
+    evaluator = BackgroundEvaluator(tree, loop=loop, on_progress=report)
+    evaluator.start()
+    loop.run()
+
+If the tree changes while evaluating, the evaluation is cancelled and started
+again. Value changes are noticed by the worker, changes of nodes and links by
+poll on the main thread. Results are only written to the execution plan when a
+run completes without changes in between.
+"""
+
+import bpy
+import queue
+import threading
+import time
+from concurrent.futures import Future, CancelledError
+from pynodes_framework.execution import ExecutionContext, get_plan, tree_revision, wrap_lazy_inputs
+
+
+class MainThreadQueue():
+    """Function calls from worker threads, executed when the main thread processes the queue"""
+
+    def __init__(self):
+        self._calls = queue.Queue()
+
+    def call(self, function, *args):
+        """Call function on the main thread and wait for the result"""
+        if threading.current_thread() is threading.main_thread():
+            return function(*args)
+        future = Future()
+        self._calls.put((future, function, args))
+        return future.result()
+
+    def post(self, function, *args):
+        """Call function on the main thread without waiting"""
+        self._calls.put((None, function, args))
+
+    def process(self):
+        """Execute all pending calls, returns the number of calls"""
+        count = 0
+        while True:
+            try:
+                future, function, args = self._calls.get_nowait()
+            except queue.Empty:
+                return count
+            count += 1
+            if future is None:
+                function(*args)
+            elif future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(function(*args))
+                except Exception as exc:
+                    future.set_exception(exc)
+
+    def cancel(self):
+        """Drop pending calls, waiting threads get a CancelledError"""
+        while True:
+            try:
+                future, function, args = self._calls.get_nowait()
+            except queue.Empty:
+                return
+            if future is not None:
+                future.cancel()
+
+
+class HeadlessLoop():
+    """Stand-in for bpy.app.timers, runs registered functions when run is called.
+
+    Functions return the interval until the next call or None to be removed.
+    """
+
+    def __init__(self):
+        self.functions = []
+
+    def register(self, function, first_interval=0.0):
+        self.functions.append([function, time.perf_counter() + first_interval])
+
+    def is_registered(self, function):
+        return any(entry[0] is function for entry in self.functions)
+
+    def run_once(self):
+        """Call all due functions once, returns True while functions are registered"""
+        now = time.perf_counter()
+        for entry in list(self.functions):
+            function, due = entry
+            if due > now:
+                continue
+            interval = function()
+            if interval is None:
+                self.functions.remove(entry)
+            else:
+                entry[1] = now + interval
+        return bool(self.functions)
+
+    def run(self, timeout=None):
+        """Run until no functions are registered, returns False on timeout"""
+        end = time.perf_counter() + timeout if timeout is not None else None
+        while self.run_once():
+            if end is not None and time.perf_counter() > end:
+                return False
+            time.sleep(0.001)
+        return True
+
+
+class _Run():
+    # state of one evaluation attempt
+    def __init__(self, plan, indices, values, context):
+        self.plan = plan
+        self.indices = indices
+        self.values = values
+        self.context = context
+        # execute policy of each step, the worker must not look up node attributes
+        self.policies = { i : getattr(plan.steps[i].node, "execute_policy", 'MAIN') for i in indices }
+        self.revision = tree_revision(plan.tree)
+        self.changes = plan.changes
+        self.cancelled = threading.Event()
+
+    def is_changed(self):
+        # dirty tags since the start, safe to call from the worker
+        return self.plan.changes != self.changes
+
+    def is_outdated(self):
+        # main thread only, the tree revision is looked up by RNA pointer
+        return tree_revision(self.plan.tree) != self.revision or self.is_changed()
+
+
+class BackgroundEvaluator():
+    """Evaluates the dirty nodes of a tree on a worker thread.
+
+    on_progress(evaluator, done, total, node_name) is called on the main thread
+    after each node, on_finished(evaluator) when the results are available.
+    state is one of 'IDLE', 'RUNNING', 'FINISHED', 'CANCELLED' or 'FAILED'.
+    """
+
+    poll_interval = 0.01
+
+    def __init__(self, tree, on_progress=None, on_finished=None, restart=True, loop=None):
+        self.tree = tree
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self.restart = restart
+        self.loop = loop if loop is not None else getattr(bpy.app, "timers", None)
+        self.queue = MainThreadQueue()
+        self.state = 'IDLE'
+        self.error = None
+        self.progress = (0, 0)
+        self.restarts = 0
+        self._run = None
+        self._context = None
+        # worker threads, cancelled ones may still wait for a main thread call
+        self._threads = []
+        # the same bound method object, timers compare registered functions by identity
+        self._poll = self.poll
+
+    def start(self, context=None):
+        """Start evaluating, must be called on the main thread"""
+        if self._run is not None:
+            self._cancel_run()
+
+        plan = get_plan(self.tree)
+        # restarts create a new context unless one is given
+        self._context = context
+        if context is None:
+            context = ExecutionContext(self.tree, plan)
+        else:
+            context.plan = plan
+        indices = [i for i, dirty in enumerate(plan.dirty) if dirty]
+        # RNA reads happen here on the main thread, the worker only sees the copies
+        plan.resolve_idrefs(context)
+        values = list(plan.values)
+        for i in indices:
+            plan.step_inputs(i, values)
+
+        run = self._run = _Run(plan, indices, values, context)
+        self.state = 'RUNNING'
+        self.error = None
+        self.progress = (0, len(indices))
+        thread = threading.Thread(target=self._work, args=(run,), name="pynodes evaluation", daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+        if self.loop is not None and not self.loop.is_registered(self._poll):
+            self.loop.register(self._poll, first_interval=0.0)
+
+    def cancel(self):
+        """Stop the current evaluation, the plan keeps its previous values"""
+        if self._run is not None:
+            self._cancel_run()
+            self.state = 'CANCELLED'
+
+    def _cancel_run(self):
+        self._run.cancelled.set()
+        self._run = None
+        # release a worker waiting for a main thread call
+        self.queue.cancel()
+
+    def _work(self, run):
+        plan = run.plan
+        values = run.values
+        total = len(run.indices)
+        try:
+            for done, i in enumerate(run.indices):
+                # structural changes are noticed by poll on the main thread
+                if run.cancelled.is_set() or run.is_changed():
+                    raise CancelledError()
+
+                step = plan.steps[i]
+                inputs = plan.step_inputs(i, values, load_constants=False)
+                policy = run.policies[i]
+                if policy == 'PROCESS':
+                    result = type(step.node).execute_process(inputs)
+                else:
+                    if step.lazy_inputs:
+                        wrap_lazy_inputs(step, inputs)
+                    if policy == 'THREAD':
+                        result = step.execute(run.context, inputs)
+                    else:
+                        result = self.queue.call(self._execute_main, run, step, inputs)
+
+                plan.store_outputs(i, result, values)
+                self.queue.post(self._report_progress, run, done + 1, total, step.name)
+        except CancelledError:
+            self.queue.post(self._finish, run, CancelledError())
+        except Exception as exc:
+            self.queue.post(self._finish, run, exc)
+        else:
+            self.queue.post(self._finish, run, None)
+
+    def _execute_main(self, run, step, inputs):
+        # calls queued by a worker after its run was cancelled are not executed
+        if run.cancelled.is_set():
+            raise CancelledError()
+        return step.execute(run.context, inputs)
+
+    def _report_progress(self, run, done, total, node_name):
+        if run is not self._run:
+            return
+        self.progress = (done, total)
+        if self.on_progress:
+            self.on_progress(self, done, total, node_name)
+
+    def _finish(self, run, error):
+        if run is not self._run:
+            # results of a cancelled run
+            return
+
+        if run.is_outdated():
+            self._run = None
+            if self.restart:
+                self.restarts += 1
+                self.start(self._context)
+            else:
+                self.state = 'CANCELLED'
+            return
+
+        self._run = None
+        if isinstance(error, CancelledError):
+            self.state = 'CANCELLED'
+            return
+        if error is not None:
+            self.state = 'FAILED'
+            self.error = error
+            return
+
+        # commit results, no changes happened since the start
+        plan = run.plan
+        for i in run.indices:
+            step = plan.steps[i]
+            for identifier, slot in step.inputs:
+                plan.values[slot] = run.values[slot]
+            for identifier, slot in step.outputs:
+                plan.values[slot] = run.values[slot]
+            plan.finish_step(i)
+        self.state = 'FINISHED'
+        if self.on_finished:
+            self.on_finished(self)
+
+    def poll(self):
+        """Process main thread calls and restart outdated runs.
+
+        Returns the interval until the next poll while running, None when done,
+        so it can be registered with bpy.app.timers directly.
+        """
+        self.queue.process()
+        run = self._run
+        if run is not None and run.is_outdated() and self.restart:
+            # don't wait for the worker to notice the change
+            self._cancel_run()
+            self.restarts += 1
+            self.start(self._context)
+        # keep polling until cancelled workers are released from their main thread calls
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        return self.poll_interval if self._run is not None or self._threads else None
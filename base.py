@@ -24,8 +24,17 @@ from bpy.types import PropertyGroup
 from bpy_types import StructRNA, RNAMetaPropGroup, OrderedDictMini
 from bpy.props import *
 from collections import OrderedDict
+from contextlib import contextmanager
+from bisect import bisect_left
+import hashlib
+from types import MappingProxyType
+from array import array
+from mathutils import Matrix
 from pynodes_framework.parameter import *
-from pynodes_framework.idref import MetaIDRefContainer
+from pynodes_framework.idref import MetaIDRefContainer, IDRefProperty, resolve_idrefs
+from pynodes_framework import execution, idref
+from pynodes_framework.execution import tag_tree_changed, tag_node_changed, get_plan, tree_revision
+from pynodes_framework.topology import update_topology
 
 
 class MetaNodeSocket(RNAMetaPropGroup):
@@ -68,8 +77,61 @@ class PyNodesSocket(bpy.types.NodeSocket, NodeSocket):
     parameter_types = parameter_types_all
 
 
+# ID property key storing the layout signature a node was last verified with
+_layout_signature_key = "_pynodes_layout"
+
 class NodeTree():
-    pass
+    def verify_all(self):
+        """Verify sockets of all nodes whose class layout changed since their last verification.
+
+        Returns the number of nodes that have been verified.
+        """
+        outdated = []
+        for node in self.nodes:
+            signature = getattr(node, "_node_layout_signature", None)
+            if signature is not None and node.get(_layout_signature_key, None) != signature:
+                outdated.append(node)
+
+        for node in outdated:
+            node._verify_sockets()
+        return len(outdated)
+
+    def resolve_idrefs(self):
+        """Resolve IDRef properties of all nodes at once, returns a (node, attr) -> ID dict"""
+        return resolve_idrefs(self.nodes)
+
+    def update(self):
+        # Note: subclasses overriding update should call this to keep plans in sync
+        tag_tree_changed(self)
+        # links that would create a dependency cycle are removed again
+        update_topology(self, tree_revision(self))
+
+    # leave out nodes not reaching an output node and fold constant nodes when compiling plans,
+    # unlinked inputs of folded nodes can't be overridden in batch evaluation then
+    optimize_execution = False
+
+    def execution_plan(self):
+        """Compiled execution plan, reused until nodes or links change"""
+        return get_plan(self)
+
+    def evaluate(self, context=None, cache=None):
+        """Execute all dirty nodes of the tree, returns the execution plan holding the values"""
+        plan = self.execution_plan()
+        plan.run(context, cache)
+        return plan
+
+    def evaluate_frames(self, frames, outputs=None, context=None):
+        """Generator yielding (frame, values) for each frame, outputs is a list of output sockets.
+
+        Values are a dict keyed by (node name, identifier), see ExecutionPlan.stream_frames.
+        """
+        if outputs is not None:
+            outputs = [(socket.node.name, socket.identifier) for socket in outputs]
+        return self.execution_plan().stream_frames(frames, outputs, context)
+
+    def evaluate_output(self, socket, context=None):
+        """Value of an output socket, only evaluates the nodes it depends on"""
+        return self.execution_plan().pull(socket.node.name, socket.identifier, context)
 
 
 class NodeOrderedDict(dict):
@@ -94,13 +156,64 @@ class NodeOrderedDict(dict):
             del self.node_parameters[key]
 
 
+# Nodes created while restoring saved data skip the init function of their type,
+# values are written from the saved data afterwards. Sockets are still added.
+_restoring_nodes = 0
+
+@contextmanager
+def restoring_nodes():
+    global _restoring_nodes
+    _restoring_nodes += 1
+    try:
+        yield
+    finally:
+        _restoring_nodes -= 1
+
+
+# python types of numeric parameter values by type code
+_value_types = {"f" : float, "i" : int, "?" : bool}
+
+def _node_update_callback(prop_update):
+    def node_update(self, context):
+        if prop_update:
+            prop_update(self, context)
+
+        tag_node_changed(self)
+    node_update.tags_node_changed = True
+    return node_update
+
+def _add_node_update(prop):
+    """Wrap the property update callback to tag the node dirty for evaluation"""
+    prop_update = prop[1].get("update", None)
+    if getattr(prop_update, "tags_node_changed", False):
+        return
+    prop[1]["update"] = _node_update_callback(prop_update)
+
+def _add_idref_node_update(idrefprop):
+    # must happen before the IDRef is registered, the name property keeps the callback
+    if not getattr(idrefprop.update, "tags_node_changed", False):
+        idrefprop.update = _node_update_callback(idrefprop.update)
+
+
+def _is_deferred_property(value):
+    # bpy.props functions return a (function, keywords) tuple until the class is registered
+    return isinstance(value, tuple) and len(value) == 2 and callable(value[0]) and isinstance(value[1], dict)
+
+def _add_property_node_update(prop):
+    # collection properties have no update callback
+    if prop[0] is not bpy.props.CollectionProperty:
+        _add_node_update(prop)
+
+
 class MetaNode(MetaIDRefContainer(RNAMetaPropGroup)):
     def __prepare__(name, bases, **kwargs):
         return NodeOrderedDict()
 
     def _verify_parameter(self, param):
         if param.prop:
+            _add_node_update(param.prop)
             setattr(self, param.identifier, param.prop)
+        param.freeze()
 
     def __setattr__(self, key, value):
         if isinstance(value, NodeParameter):
@@ -112,14 +225,68 @@ class MetaNode(MetaIDRefContainer(RNAMetaPropGroup)):
             self._node_type_parameters[key] = value
 
             self._verify_parameter(value)
+            self._update_parameter_tables()
         else:
+            if isinstance(value, IDRefProperty):
+                _add_idref_node_update(value)
+            elif _is_deferred_property(value) and key not in self._node_type_parameters:
+                _add_property_node_update(value)
+                self._add_property_name(key)
             super().__setattr__(key, value)
 
+    def _add_property_name(self, key):
+        # RNA properties besides parameters, execute may read them
+        if key not in self._node_property_names:
+            super().__setattr__("_node_property_names", self._node_property_names + (key,))
+
+    def __delattr__(self, key):
+        params = self.__dict__.get("_node_type_parameters", {})
+        if key in params:
+            param = params.pop(key)
+            if param.prop:
+                super().__delattr__(key)
+            self._update_parameter_tables()
+        else:
+            super().__delattr__(key)
+            if key in self._node_property_names:
+                super().__setattr__("_node_property_names", tuple(name for name in self._node_property_names if name != key))
+
+    def _update_parameter_tables(self):
+        # frozen per-direction lookup tables, indexed by the is_output flag:
+        # (ordered parameter tuple, identifier -> parameter map)
+        tables = []
+        for output in (False, True):
+            params = tuple(param for param in self._node_type_parameters.values() if param.is_output == output)
+            tables.append((params, MappingProxyType({ param.identifier : param for param in params })))
+        super().__setattr__("_node_parameter_tables", tuple(tables))
+
+        # flat value buffer layout of numeric parameters for each direction:
+        # (tuple of (identifier, offset, length, value type), total length)
+        layouts = []
+        for params, _ in tables:
+            entries = []
+            offset = 0
+            for param in params:
+                if param.value_shape is None:
+                    continue
+                length = 1
+                for dim in param.value_shape:
+                    length *= dim
+                entries.append((param.identifier, offset, length, _value_types[param.value_dtype]))
+                offset += length
+            layouts.append((tuple(entries), offset))
+        super().__setattr__("_node_value_layouts", tuple(layouts))
+
+        # cheap layout signature, stored on nodes after socket verification
+        layout = [(param.identifier, param.name, getattr(param, "datatype_identifier", ""), param.is_output, param.use_socket)
+                  for param in self._node_type_parameters.values()]
+        super().__setattr__("_node_layout_signature", hashlib.md5(repr(layout).encode()).hexdigest())
+
     def __new__(cls, name, bases, classdict):
         # Wrapper for node.init, to add sockets from templates
         init_base = classdict.get('init', None)
         def init_node(self, context):
-            if init_base:
+            if init_base and not _restoring_nodes:
                 init_base(self, context)
             self._verify_sockets()
         classdict["init"] = init_node
@@ -130,75 +297,197 @@ class MetaNode(MetaIDRefContainer(RNAMetaPropGroup)):
             node_type_parameters = OrderedDict()
         classdict["_node_type_parameters"] = node_type_parameters
 
+        for item in classdict.values():
+            if isinstance(item, IDRefProperty):
+                _add_idref_node_update(item)
+
+        # names of RNA properties that are not parameters, including inherited ones
+        property_names = []
+        for base in bases:
+            property_names.extend(name for name in getattr(base, "_node_property_names", ()) if name not in property_names)
+        for attr, item in classdict.items():
+            if _is_deferred_property(item):
+                _add_property_node_update(item)
+                if attr not in property_names:
+                    property_names.append(attr)
+        classdict["_node_property_names"] = tuple(property_names)
+
         nodecls = super().__new__(cls, name, bases, classdict)
 
         # Add properties from node type parameters
-        for param in node_type_parameters:
+        for param in node_type_parameters.values():
             nodecls._verify_parameter(param)
+        nodecls._update_parameter_tables()
 
         return nodecls
 
 
 class Node(metaclass=MetaNode):
-    def _find_input(self, identifier):
-        for i, socket in enumerate(self.inputs):
-            if socket.identifier == identifier:
-                return i, socket
-        return -1, None
-    def _find_output(self, identifier):
-        for i, socket in enumerate(self.outputs):
-            if socket.identifier == identifier:
-                return i, socket
-        return -1, None
-
     def socket_data(self):
         return self
 
+    # outputs depend only on the input values,
+    # set to False for nodes reading other data so results are never cached or shared
+    execute_pure = True
+    # where execute may run with the parallel scheduler: 'MAIN', 'THREAD' or 'PROCESS'
+    execute_policy = 'MAIN'
+    # output identifier -> python expression template of the inputs, inlined by the compiler
+    expressions = None
+    # outputs depend on context.frame, executed for every frame when streaming a frame range
+    time_dependent = False
+    # identifiers of inputs passed to execute as functions returning the value,
+    # when pulling outputs the nodes upstream of lazy inputs only run if the function is called
+    lazy_inputs = ()
+    # final consumer of values, e.g. writing results to scene data. If a tree has
+    # output nodes, nodes that none of them depends on are not executed.
+    is_output_node = False
+
+    def value_layout(self, output):
+        """Layout of the read_values buffer, a tuple of (identifier, offset, length, value type)"""
+        return self._node_value_layouts[output][0]
+
+    def read_values(self, output=False):
+        """Pack all numeric parameter values of one direction into a flat float buffer"""
+        data = self.socket_data()
+        values = []
+        for identifier, offset, length, value_type in self._node_value_layouts[output][0]:
+            value = getattr(data, identifier)
+            if length == 1:
+                values.append(value)
+            elif isinstance(value, Matrix):
+                # same column-major order as the flat property storage
+                values.extend(x for col in value.col for x in col)
+            else:
+                values.extend(value)
+        return array('d', values)
+
+    def write_values(self, values, output=False):
+        """Set parameter values from a flat buffer in value_layout order or an identifier mapping"""
+        data = self.socket_data()
+        if hasattr(values, "items"):
+            for identifier, value in values.items():
+                setattr(data, identifier, value)
+            return
+
+        entries, size = self._node_value_layouts[output]
+        if len(values) != size:
+            raise ValueError("Expected %d values for %s, got %d" % (size, "outputs" if output else "inputs", len(values)))
+        for identifier, offset, length, value_type in entries:
+            if length == 1:
+                setattr(data, identifier, value_type(values[offset]))
+            else:
+                setattr(data, identifier, values[offset:offset+length])
+
+    def execute(self, context, inputs):
+        """Compute output values during tree evaluation.
+
+        inputs maps input parameter identifiers to their values.
+        Returns a dict of output values by output parameter identifier.
+        """
+        return {}
+
     def node_parameters(self, output):
-        for param in self._node_type_parameters.values():
-            if param.is_output == output:
-                yield param
+        return self._node_parameter_tables[output][0]
 
     def find_node_parameter(self, output, identifier):
-        for param in self.node_parameters(output):
-            if param.identifier == identifier:
-                return param
+        param = self._node_parameter_tables[output][1].get(identifier, None)
+        if param is not None:
+            return param
         raise KeyError("NodeParameter %r not found in %s" % (identifier, "outputs" if output else "inputs"))
 
     def _verify_sockets(self):
         for output in {False, True}:
-            if output:
-                sockets = self.outputs
-                find_socket = self._find_output
-            else:
-                sockets = self.inputs
-                find_socket = self._find_input
+            sockets = self.outputs if output else self.inputs
 
-            unused = { socket for socket in sockets }
+            # identifier lookup table, built once per pass
+            socket_index = { socket.identifier : socket for socket in sockets }
+            params = [param for param in self.node_parameters(output) if param.use_socket]
 
-            for i, param in enumerate(self.node_parameters(output)):
-                if not param.use_socket:
-                    continue
+            # fresh nodes: sockets are created in order, nothing to match up
+            if not socket_index:
+                for param in params:
+                    param.make_socket(self, output)
+                continue
 
-                pos, socket = find_socket(param.name)
+            # remove unused old sockets first, so they don't need to be moved around
+            # XXX unset old properties here!
+            used = { param.identifier for param in params }
+            for identifier, socket in list(socket_index.items()):
+                if identifier not in used:
+                    sockets.remove(socket)
+                    del socket_index[identifier]
+
+            for param in params:
+                socket = socket_index.get(param.identifier, None)
                 if socket:
                     param.verify_socket(socket)
-                    sockets.move(pos, i)
-
-                    unused.remove(socket)
                 else:
-                    socket = param.make_socket(self, output)
-                    # socket gets appended at the end, move to correct position
-                    sockets.move(len(sockets)-1, i)
-
-            # remove unused old sockets
-            # XXX unset old properties here!
-            for socket in unused:
-                sockets.remove(socket)
+                    # new sockets get appended at the end, reordered below
+                    param.make_socket(self, output)
+
+            _reorder_sockets(sockets, [param.identifier for param in params])
+
+        self[_layout_signature_key] = self._node_layout_signature
+
+
+def _longest_increasing_subsequence(seq):
+    """Indices of a longest strictly increasing subsequence of seq, O(n log n)"""
+    tails = [] # seq index of the smallest tail for each subsequence length
+    tail_values = []
+    prev = [-1] * len(seq)
+    for i, value in enumerate(seq):
+        k = bisect_left(tail_values, value)
+        if k > 0:
+            prev[i] = tails[k-1]
+        if k == len(tails):
+            tails.append(i)
+            tail_values.append(value)
+        else:
+            tails[k] = i
+            tail_values[k] = value
+
+    result = []
+    i = tails[-1] if tails else -1
+    while i >= 0:
+        result.append(i)
+        i = prev[i]
+    result.reverse()
+    return result
+
+def _reorder_sockets(sockets, order):
+    """Sort a socket collection into the given identifier order with a minimal number of moves.
+
+    Sockets on a longest increasing subsequence of target positions stay in place,
+    every other socket is moved once, directly behind its target predecessor.
+    """
+    current = [socket.identifier for socket in sockets]
+    rank = { identifier : i for i, identifier in enumerate(order) }
+    keep = { current[i] for i in _longest_increasing_subsequence([rank[identifier] for identifier in current]) }
+    if len(keep) == len(current):
+        return
+
+    # identifier -> current index, only the range between move ends shifts
+    position = { identifier : i for i, identifier in enumerate(current) }
+    for i, identifier in enumerate(order):
+        if identifier in keep:
+            continue
+        from_index = position[identifier]
+        to_index = position[order[i-1]] + 1 if i > 0 else 0
+        if from_index < to_index:
+            to_index -= 1
+        if from_index != to_index:
+            sockets.move(from_index, to_index)
+            current.insert(to_index, current.pop(from_index))
+            for k in range(min(from_index, to_index), max(from_index, to_index) + 1):
+                position[current[k]] = k
 
 
 def register():
     bpy.utils.register_class(PyNodesSocket)
+    idref.register()
+    execution.register()
 
 def unregister():
+    execution.unregister()
+    idref.unregister()
     bpy.utils.unregister_class(PyNodesSocket)
@@ -0,0 +1,140 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""Vectorized batch evaluation of node trees using NumPy.
+
+In batch mode every numeric socket carries an array of shape (size,) + value_shape
+of its parameter type, i.e. (size,) for floats, (size, 3) for vectors,
+(size, 4) for colors and (size, 4, 4) for matrices. Nodes provide a kernel
+
+    def execute_batch(self, context, inputs):
+
+with the same contract as execute, but working on whole arrays. The batch size
+is available as context.batch_size. Nodes without a kernel are executed element
+by element as a fallback.
+"""
+
+import numpy
+from pynodes_framework.execution import ExecutionContext, get_plan, wrap_lazy_inputs
+from pynodes_framework.idref import resolve_idrefs
+
+
+def _as_batch_array(param, value, size):
+    shape = param.value_shape
+    if shape is None:
+        # non-numeric values are passed through uniformly
+        return value
+    # flat matrix properties are stored column-major
+    array = numpy.asarray(value, dtype=param.value_dtype).reshape(shape, order='F')
+    return numpy.broadcast_to(array, (size,) + shape)
+
+
+def _execute_elementwise(step, context, inputs, size):
+    arrays = { identifier : value for identifier, value in inputs.items() if isinstance(value, numpy.ndarray) }
+    results = []
+    for i in range(size):
+        element_inputs = dict(inputs)
+        for identifier, array in arrays.items():
+            element_inputs[identifier] = array[i]
+        if step.lazy_inputs:
+            wrap_lazy_inputs(step, element_inputs)
+        results.append(step.execute(context, element_inputs))
+    return { identifier : numpy.array([result.get(identifier, None) for result in results]) for identifier, _ in step.outputs }
+
+
+class BatchPlan():
+    """Batch mode variant of an ExecutionPlan"""
+
+    def __init__(self, plan):
+        self.plan = plan
+
+        constant_slots = { slot for slot, data, identifier in plan.constants }
+        self.params = {} # slot -> parameter of constant inputs
+        self.input_slots = {} # (node name, identifier) -> slot of constant inputs
+        for step in plan.steps:
+            for identifier, slot in step.inputs:
+                if slot in constant_slots:
+                    self.params[slot] = step.node.find_node_parameter(False, identifier)
+                    self.input_slots[(step.name, identifier)] = slot
+        # folded values are broadcast like constants
+        for slot, (node, identifier) in plan.literals.items():
+            self.params[slot] = node.find_node_parameter(True, identifier)
+
+        self.values = [None] * len(plan.values)
+
+    def run(self, size, inputs={}, context=None):
+        """Evaluate the tree for size elements at once.
+
+        inputs maps (node name, input identifier) of unlinked inputs to arrays,
+        all other unlinked inputs are broadcast from their socket value.
+        Returns the slot value list.
+        """
+        plan = self.plan
+        if context is None:
+            context = ExecutionContext(plan.tree, plan)
+        context.batch_size = size
+        context.idrefs = resolve_idrefs(step.node for step in plan.steps if step.has_idrefs)
+        values = self.values
+
+        for slot, data, identifier in plan.constants:
+            values[slot] = _as_batch_array(self.params[slot], getattr(data, identifier), size)
+        for slot in plan.literals:
+            values[slot] = _as_batch_array(self.params[slot], plan.values[slot], size)
+        for key, array in inputs.items():
+            slot = self.input_slots.get(key, None)
+            if slot is None:
+                raise KeyError("%r is not an unlinked input of the plan, it may be folded into a constant" % (key,))
+            param = self.params[slot]
+            array = numpy.asarray(array, dtype=param.value_dtype)
+            values[slot] = numpy.broadcast_to(array, (size,) + param.value_shape)
+
+        for step in plan.steps:
+            step_inputs = { identifier : values[slot] for identifier, slot in step.inputs }
+            kernel = getattr(step.node, "execute_batch", None)
+            if kernel is not None:
+                if step.lazy_inputs:
+                    wrap_lazy_inputs(step, step_inputs)
+                result = kernel(context, step_inputs)
+            else:
+                result = _execute_elementwise(step, context, step_inputs, size)
+            for identifier, slot in step.outputs:
+                values[slot] = result.get(identifier, None)
+
+        return values
+
+    def output_value(self, node_name, identifier):
+        """Output array from the last batch run"""
+        return self.values[self.plan.slots[(node_name, identifier)]]
+
+
+def get_batch_plan(tree):
+    """Batch plan of a tree, shares the invalidation of the regular execution plan"""
+    plan = get_plan(tree)
+    batch_plan = getattr(plan, "batch_plan", None)
+    if batch_plan is None:
+        batch_plan = BatchPlan(plan)
+        plan.batch_plan = batch_plan
+    return batch_plan
+
+def evaluate_batch(tree, size, inputs={}, context=None):
+    """Evaluate a tree in batch mode, returns the batch plan holding the output arrays"""
+    batch_plan = get_batch_plan(tree)
+    batch_plan.run(size, inputs, context)
+    return batch_plan
@@ -0,0 +1,841 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""Minimal in-process stand-in for the bpy modules used by pynodes_framework.
+
+Only the behaviour the framework relies on is emulated: deferred bpy.props
+definitions, class registration, ID properties, node trees with socket
+collections (new/move/remove) and links, and the bpy.data ID collections.
+Call install() before importing the framework, then load_framework() to
+import the package from a source checkout.
+"""
+
+import contextlib
+import numbers
+import sys
+import types
+import importlib.util
+import os
+
+
+### bpy.props ###
+
+def _make_prop_func(name, default):
+    def propfunc(*args, **kw):
+        if args:
+            kw["name"] = args[0]
+        return (propfunc, kw)
+    propfunc.__name__ = name
+    propfunc._is_bpy_prop = True
+    propfunc._default = default
+    return propfunc
+
+FloatProperty = _make_prop_func("FloatProperty", 0.0)
+IntProperty = _make_prop_func("IntProperty", 0)
+BoolProperty = _make_prop_func("BoolProperty", False)
+StringProperty = _make_prop_func("StringProperty", "")
+EnumProperty = _make_prop_func("EnumProperty", "")
+FloatVectorProperty = _make_prop_func("FloatVectorProperty", 0.0)
+IntVectorProperty = _make_prop_func("IntVectorProperty", 0)
+BoolVectorProperty = _make_prop_func("BoolVectorProperty", False)
+PointerProperty = _make_prop_func("PointerProperty", None)
+CollectionProperty = _make_prop_func("CollectionProperty", None)
+
+_prop_funcs = [FloatProperty, IntProperty, BoolProperty, StringProperty, EnumProperty,
+               FloatVectorProperty, IntVectorProperty, BoolVectorProperty,
+               PointerProperty, CollectionProperty]
+
+
+def _is_prop(value):
+    return (isinstance(value, tuple) and len(value) == 2 and
+            getattr(value[0], "_is_bpy_prop", False) and isinstance(value[1], dict))
+
+
+class PropArray(list):
+    """Stand-in for bpy_prop_array"""
+
+    def foreach_get(self, seq):
+        seq[:] = self
+
+    def foreach_set(self, seq):
+        self[:] = seq
+
+
+class RNAProperty():
+    """Descriptor emulating a registered RNA property"""
+
+    def __init__(self, attr, definition):
+        self.attr = attr
+        self.func, self.kw = definition
+        size = self.kw.get("size", None)
+        default = self.kw.get("default", None)
+        if self.func is EnumProperty and default is None:
+            items = self.kw.get("items", [])
+            default = items[0][0] if isinstance(items, list) and items else ""
+        if size is not None:
+            if default is None:
+                default = [self.func._default] * size
+            self.default = PropArray(default)
+        else:
+            self.default = self.func._default if default is None else default
+
+    def _check_type(self, value):
+        # like RNA, numeric properties reject values of the wrong type or size
+        if self.func not in (FloatProperty, IntProperty, BoolProperty,
+                             FloatVectorProperty, IntVectorProperty, BoolVectorProperty):
+            return
+        if isinstance(self.default, PropArray):
+            if isinstance(value, (str, numbers.Number)) or len(value) != len(self.default):
+                raise TypeError("%s expected a sequence of %d items" % (self.attr, len(self.default)))
+        elif not isinstance(value, numbers.Number):
+            raise TypeError("%s expected a number, not %s" % (self.attr, type(value).__name__))
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        getter = self.kw.get("get", None)
+        if getter:
+            return getter(instance)
+        values = instance.__dict__.setdefault("_rna_values", {})
+        if self.attr not in values:
+            default = self.default
+            values[self.attr] = PropArray(default) if isinstance(default, PropArray) else default
+        value = values[self.attr]
+        if self.kw.get("subtype", None) == 'MATRIX' and len(value) == 16:
+            # matrix properties read back as mathutils.Matrix, stored column-major
+            return Matrix([value[i::4] for i in range(4)])
+        return value
+
+    def __set__(self, instance, value):
+        setter = self.kw.get("set", None)
+        if setter:
+            setter(instance, value)
+        else:
+            values = instance.__dict__.setdefault("_rna_values", {})
+            if isinstance(value, Matrix):
+                value = [x for col in value.col for x in col]
+            self._check_type(value)
+            if isinstance(self.default, PropArray):
+                value = PropArray(value)
+            values[self.attr] = value
+        update = self.kw.get("update", None)
+        if update:
+            update(instance, context)
+
+
+### bpy_types ###
+
+class RNAMetaPropGroup(type):
+    def __new__(cls, name, bases, classdict, **kw):
+        struct_cls = type.__new__(cls, name, bases, dict(classdict))
+        for attr, value in list(struct_cls.__dict__.items()):
+            if _is_prop(value):
+                type.__setattr__(struct_cls, attr, RNAProperty(attr, value))
+        return struct_cls
+
+    def __setattr__(self, key, value):
+        if _is_prop(value):
+            value = RNAProperty(key, value)
+        type.__setattr__(self, key, value)
+
+
+RNAMeta = RNAMetaPropGroup
+
+
+class OrderedDictMini(dict):
+    pass
+
+
+class bpy_struct():
+    """Base for all fake RNA structs, with ID property storage"""
+
+    def _idprops(self):
+        return self.__dict__.setdefault("_idprop_values", {})
+
+    def __getitem__(self, key):
+        return self._idprops()[key]
+
+    def __setitem__(self, key, value):
+        self._idprops()[key] = value
+
+    def __delitem__(self, key):
+        del self._idprops()[key]
+
+    def __contains__(self, key):
+        return key in self._idprops()
+
+    def get(self, key, default=None):
+        return self._idprops().get(key, default)
+
+    def keys(self):
+        return self._idprops().keys()
+
+    def as_pointer(self):
+        return id(self)
+
+    def path_from_id(self):
+        return ""
+
+    def path_resolve(self, path):
+        if not path:
+            return self
+        raise ValueError("Path %r not found" % path)
+
+    @property
+    def id_data(self):
+        return self.__dict__.get("_id_data", self)
+
+
+StructRNA = bpy_struct
+
+
+### bpy.types ###
+
+class PropertyGroup(bpy_struct, metaclass=RNAMetaPropGroup):
+    pass
+
+
+class ID(bpy_struct, metaclass=RNAMetaPropGroup):
+    def __init__(self, name=""):
+        self.name = name
+        self.use_fake_user = False
+        self.users = 0
+
+    def __repr__(self):
+        return "bpy.data.%r" % self.name
+
+
+class Object(ID):
+    pass
+
+
+class NodeSocket(bpy_struct, metaclass=RNAMetaPropGroup):
+    bl_idname = "NodeSocket"
+
+    def _init_socket(self, node, in_out, name, identifier):
+        self.__dict__["_id_data"] = node.id_data
+        self.node = node
+        self.in_out = in_out
+        self.name = name
+        self.identifier = identifier
+        self.link_limit = 1
+        self.enabled = True
+        self.hide = False
+        self._links = []
+
+    @property
+    def links(self):
+        return list(self._links)
+
+    @property
+    def is_linked(self):
+        return bool(self._links)
+
+
+class NodeSocketCollection():
+    """Stand-in for NodeInputs/NodeOutputs"""
+
+    def __init__(self, node, in_out):
+        self.node = node
+        self.in_out = in_out
+        self.items = []
+
+    def new(self, type, name, identifier=""):
+        cls = _registry.get(type, None)
+        if cls is None or not issubclass(cls, NodeSocket):
+            raise RuntimeError("Socket type %r not registered" % type)
+        socket = cls.__new__(cls)
+        socket._init_socket(self.node, self.in_out, name, identifier or name)
+        self.items.append(socket)
+        return socket
+
+    def move(self, from_index, to_index):
+        if from_index == to_index or from_index < 0 or to_index < 0:
+            return
+        if from_index >= len(self.items) or to_index >= len(self.items):
+            return
+        stats["socket_moves"] += 1
+        self.items.insert(to_index, self.items.pop(from_index))
+
+    def remove(self, socket):
+        tree = self.node.id_data
+        for link in socket.links:
+            tree.links.remove(link)
+        self.items.remove(socket)
+
+    def clear(self):
+        for socket in list(self.items):
+            self.remove(socket)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            for socket in self.items:
+                if socket.name == key:
+                    return socket
+            raise KeyError(key)
+        return self.items[key]
+
+    def get(self, key, default=None):
+        for socket in self.items:
+            if socket.name == key:
+                return socket
+        return default
+
+    def values(self):
+        return list(self.items)
+
+
+class Node(bpy_struct, metaclass=RNAMetaPropGroup):
+    bl_idname = "Node"
+
+    def _init_node(self, tree, name):
+        self.__dict__["_id_data"] = tree
+        self.name = name
+        self.label = ""
+        self.mute = False
+        self.location = (0.0, 0.0)
+        self.inputs = NodeSocketCollection(self, 'IN')
+        self.outputs = NodeSocketCollection(self, 'OUT')
+
+    @property
+    def name(self):
+        return self.__dict__["_name"]
+
+    @name.setter
+    def name(self, value):
+        old = self.__dict__.get("_name", None)
+        by_name = self.id_data.nodes.by_name
+        if by_name.get(old, None) is self:
+            del by_name[old]
+            # free names are kept as they are, like names of removed nodes
+            if value in by_name:
+                value = self.id_data.nodes._unique_name(value)
+            by_name[value] = self
+        self.__dict__["_name"] = value
+
+    def path_from_id(self):
+        return "nodes[%s]" % _quoted(self.name)
+
+    def __repr__(self):
+        return "bpy.data.node_groups[%r].nodes[%r]" % (self.id_data.name, self.name)
+
+
+def _quoted(name):
+    return '"%s"' % name.replace('"', '\\"')
+
+
+class NodeReroute(Node):
+    bl_idname = "NodeReroute"
+
+    def init(self, context):
+        self.inputs.new("NodeSocket", "Input")
+        self.outputs.new("NodeSocket", "Output")
+
+
+class NodeLink(bpy_struct):
+    def __init__(self, tree, from_socket, to_socket):
+        self.__dict__["_id_data"] = tree
+        self.from_node = from_socket.node
+        self.from_socket = from_socket
+        self.to_node = to_socket.node
+        self.to_socket = to_socket
+        self.is_valid = True
+        self.is_hidden = False
+
+
+class NodeCollection():
+    def __init__(self, tree):
+        self.tree = tree
+        self.items = []
+        self.by_name = {}
+        self.name_counters = {}
+
+    def _unique_name(self, name):
+        i = self.name_counters.get(name, 0)
+        unique = name if i == 0 else "%s.%03d" % (name, i)
+        while unique in self.by_name:
+            i += 1
+            unique = "%s.%03d" % (name, i)
+        self.name_counters[name] = i + 1
+        return unique
+
+    def new(self, type):
+        cls = _registry.get(type, None)
+        if cls is None or not issubclass(cls, Node):
+            raise RuntimeError("Node type %r not registered" % type)
+        node = cls.__new__(cls)
+        node._init_node(self.tree, self._unique_name(getattr(cls, "bl_label", type)))
+        self.items.append(node)
+        self.by_name[node.name] = node
+        if hasattr(node, "init"):
+            node.init(context)
+        self.tree._tag_update()
+        return node
+
+    def remove(self, node):
+        for link in list(self.tree.links):
+            if link.from_node is node or link.to_node is node:
+                self.tree.links.remove(link, update=False)
+        self.items.remove(node)
+        del self.by_name[node.name]
+        self.tree._tag_update()
+
+    def clear(self):
+        self.tree.links.clear()
+        self.items.clear()
+        self.by_name.clear()
+        self.tree._tag_update()
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.by_name[key]
+        return self.items[key]
+
+    def get(self, key, default=None):
+        return self.by_name.get(key, default)
+
+
+class NodeLinkCollection():
+    def __init__(self, tree):
+        self.tree = tree
+        self.items = []
+
+    def new(self, input, output):
+        # note: same argument order as the RNA API, from_socket first
+        from_socket, to_socket = input, output
+        if from_socket.in_out == 'IN':
+            from_socket, to_socket = to_socket, from_socket
+        limit = to_socket.link_limit
+        existing = to_socket._links
+        if limit and len(existing) >= limit:
+            for link in existing[:len(existing) - limit + 1]:
+                self.remove(link, update=False)
+        link = NodeLink(self.tree, from_socket, to_socket)
+        self.items.append(link)
+        from_socket._links.append(link)
+        to_socket._links.append(link)
+        self.tree._tag_update()
+        return link
+
+    def remove(self, link, update=True):
+        self.items.remove(link)
+        link.from_socket._links.remove(link)
+        link.to_socket._links.remove(link)
+        if update:
+            self.tree._tag_update()
+
+    def clear(self):
+        for link in self.items:
+            link.from_socket._links.clear()
+            link.to_socket._links.clear()
+        del self.items[:]
+        self.tree._tag_update()
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+
+class NodeTree(ID):
+    bl_idname = "NodeTree"
+
+    def _init_tree(self, name):
+        ID.__init__(self, name)
+        self.nodes = NodeCollection(self)
+        self.links = NodeLinkCollection(self)
+
+    def _tag_update(self):
+        if getattr(self, "_batch_depth", 0):
+            self._batch_updated = True
+        elif hasattr(self, "update"):
+            self.update()
+
+    @contextlib.contextmanager
+    def batch_update(self):
+        """Several edits followed by a single update, like an editor operator"""
+        self._batch_depth = getattr(self, "_batch_depth", 0) + 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth and getattr(self, "_batch_updated", False):
+                self._batch_updated = False
+                self._tag_update()
+
+    def path_resolve(self, path):
+        # only node paths are supported
+        if path.startswith('nodes["') and path.endswith('"]'):
+            node = self.nodes.get(path[7:-2].replace('\\"', '"'), None)
+            if node is not None:
+                return node
+        return ID.path_resolve(self, path)
+
+    def update_interface(self):
+        pass
+
+
+class UILayout():
+    """Layout stand-in that records calls"""
+
+    def __init__(self):
+        self.calls = []
+        self.alignment = 'EXPAND'
+
+    def row(self, align=False):
+        return self
+
+    def column(self, align=False):
+        return self
+
+    def label(self, text="", **kw):
+        self.calls.append(("label", text))
+
+    def prop(self, data, prop, **kw):
+        self.calls.append(("prop", prop))
+
+    def prop_search(self, data, prop, search_data, search_prop, **kw):
+        self.calls.append(("prop_search", prop))
+
+    def template_component_menu(self, data, prop, name=""):
+        self.calls.append(("template_component_menu", prop))
+
+
+### bpy.data ###
+
+class IDCollection():
+    def __init__(self, idtype=ID):
+        self.idtype = idtype
+        self.items = {}
+        self.is_updated = False
+
+    def new(self, name, *args):
+        unique, i = name, 0
+        while unique in self.items:
+            i += 1
+            unique = "%s.%03d" % (name, i)
+        idblock = self.idtype.__new__(self.idtype)
+        ID.__init__(idblock, unique)
+        self.items[unique] = idblock
+        return idblock
+
+    def remove(self, idblock):
+        del self.items[idblock.name]
+
+    def rename(self, idblock, name):
+        del self.items[idblock.name]
+        idblock.name = name
+        self.items[name] = idblock
+
+    def get(self, key, default=None):
+        stats["id_lookups"] += 1
+        return self.items.get(key, default)
+
+    def __contains__(self, key):
+        if isinstance(key, str):
+            return key in self.items
+        return key in self.items.values()
+
+    def __getitem__(self, key):
+        return self.items[key]
+
+    def __iter__(self):
+        return iter(list(self.items.values()))
+
+    def __len__(self):
+        return len(self.items)
+
+    def keys(self):
+        return self.items.keys()
+
+
+class NodeGroupCollection(IDCollection):
+    def new(self, name, type):
+        cls = _registry[type]
+        tree = cls.__new__(cls)
+        tree._init_tree(name)
+        unique, i = name, 0
+        while unique in self.items:
+            i += 1
+            unique = "%s.%03d" % (name, i)
+        tree.name = unique
+        self.items[unique] = tree
+        return tree
+
+
+_id_collections = ['actions', 'armatures', 'brushes', 'cameras', 'curves', 'fonts',
+                   'grease_pencil', 'groups', 'images', 'lamps', 'lattices', 'libraries',
+                   'masks', 'materials', 'meshes', 'metaballs', 'movieclips',
+                   'particles', 'scenes', 'screens', 'scripts', 'shape_keys',
+                   'sounds', 'speakers', 'texts', 'textures', 'window_managers', 'worlds']
+
+
+class BlendData():
+    def __init__(self):
+        for prop in _id_collections:
+            setattr(self, prop, IDCollection())
+        self.objects = IDCollection(Object)
+        self.node_groups = NodeGroupCollection()
+        self.is_updated = False
+
+
+### bpy.utils ###
+
+_registry = {}
+
+
+def register_class(cls):
+    idname = cls.__dict__.get("bl_idname", cls.__name__)
+    _registry[idname] = cls
+    setattr(bpy_types_module_types, idname, cls)
+    stats["registered_classes"] += 1
+
+
+def unregister_class(cls):
+    idname = cls.__dict__.get("bl_idname", cls.__name__)
+    _registry.pop(idname, None)
+    if hasattr(bpy_types_module_types, idname):
+        delattr(bpy_types_module_types, idname)
+
+
+def register_module(module, verbose=False):
+    pass
+
+
+def unregister_module(module, verbose=False):
+    pass
+
+
+### bpy.app ###
+
+class _Timers():
+    def __init__(self):
+        self.pending = []
+
+    def register(self, function, first_interval=0.0, persistent=False):
+        self.pending.append(function)
+
+    def is_registered(self, function):
+        return function in self.pending
+
+    def unregister(self, function):
+        self.pending.remove(function)
+
+
+def run_timers():
+    """Run all pending bpy.app.timers callbacks once"""
+    timers = bpy.app.timers
+    pending, timers.pending = timers.pending, []
+    for function in pending:
+        interval = function()
+        if interval is not None:
+            timers.pending.append(function)
+
+
+### nodeitems_utils ###
+
+class NodeCategory():
+    @classmethod
+    def poll(cls, context):
+        return True
+
+    def __init__(self, identifier, name, description="", items=None):
+        self.identifier = identifier
+        self.name = name
+        self.description = description
+        self.items = items or []
+
+
+class NodeItem():
+    def __init__(self, nodetype, label=None, settings=None, poll=None):
+        self.nodetype = nodetype
+        self.label = label
+        self.settings = settings or {}
+        self.poll = poll
+
+
+_node_categories = {}
+
+
+def register_node_categories(identifier, cat_list):
+    if identifier in _node_categories:
+        raise KeyError("Node categories list %r already registered" % identifier)
+    _node_categories[identifier] = cat_list
+
+
+def unregister_node_categories(identifier=None):
+    if identifier is None:
+        _node_categories.clear()
+    else:
+        _node_categories.pop(identifier, None)
+
+
+### mathutils ###
+
+class Vector(tuple):
+    def __new__(cls, seq=(0.0, 0.0, 0.0)):
+        return tuple.__new__(cls, seq)
+
+
+class Matrix(list):
+    def __init__(self, rows=None):
+        if rows is None:
+            rows = [[1.0 if i == j else 0.0 for j in range(4)] for i in range(4)]
+        list.__init__(self, [list(row) for row in rows])
+
+    @property
+    def col(self):
+        return [[row[j] for row in self] for j in range(len(self[0]))]
+
+    @classmethod
+    def Identity(cls, size):
+        return cls([[1.0 if i == j else 0.0 for j in range(size)] for i in range(size)])
+
+
+### installation ###
+
+stats = {"socket_moves": 0, "id_lookups": 0, "registered_classes": 0}
+
+context = types.SimpleNamespace(space_data=None, scene=None, active_object=None)
+
+bpy = None
+bpy_types_module_types = None
+
+
+def reset_stats():
+    for key in stats:
+        stats[key] = 0
+
+
+def reset_data():
+    """Clear all ID collections, keeps registered classes"""
+    bpy.data = BlendData()
+
+
+def load_file():
+    """Emulate loading a new file: clear all data and run the load_post handlers"""
+    reset_data()
+    for handler in list(bpy.app.handlers.load_post):
+        handler(None)
+
+
+def undo():
+    """Emulate an undo step, data is kept but the undo_post handlers run"""
+    for handler in list(bpy.app.handlers.undo_post):
+        handler(None)
+
+
+def scene_update():
+    """Run the scene_update_post handlers, like Blender does after changes"""
+    for handler in list(bpy.app.handlers.scene_update_post):
+        handler(None)
+
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    return module
+
+
+def install():
+    """Insert the stand-in modules into sys.modules, returns the fake bpy module"""
+    global bpy, bpy_types_module_types
+
+    if bpy is not None:
+        return bpy
+
+    props = _module("bpy.props", **{f.__name__: f for f in _prop_funcs})
+    props.__all__ = [f.__name__ for f in _prop_funcs]
+
+    bpy_types_module_types = _module("bpy.types",
+        bpy_struct=bpy_struct, PropertyGroup=PropertyGroup, ID=ID, Object=Object,
+        Node=Node, NodeSocket=NodeSocket, NodeTree=NodeTree, NodeLink=NodeLink,
+        NodeReroute=NodeReroute, UILayout=UILayout)
+    # built-in types that can be created without registering
+    _registry.update(NodeSocket=NodeSocket, NodeReroute=NodeReroute)
+
+    utils = _module("bpy.utils", register_class=register_class, unregister_class=unregister_class,
+                    register_module=register_module, unregister_module=unregister_module)
+
+    def persistent(function):
+        function._bpy_persistent = True
+        return function
+    handlers = _module("bpy.app.handlers", load_post=[], load_pre=[], scene_update_post=[],
+                       scene_update_pre=[], frame_change_pre=[], frame_change_post=[],
+                       undo_pre=[], undo_post=[], redo_pre=[], redo_post=[],
+                       persistent=persistent)
+    app = _module("bpy.app", handlers=handlers, timers=_Timers(), version=(2, 69, 0),
+                  background=True, binary_path=sys.executable, binary_path_python=sys.executable)
+
+    bpy = _module("bpy", props=props, types=bpy_types_module_types, utils=utils, app=app,
+                  data=BlendData(), context=context)
+
+    bpy_types = _module("bpy_types", StructRNA=StructRNA, RNAMetaPropGroup=RNAMetaPropGroup,
+                        RNAMeta=RNAMeta, OrderedDictMini=OrderedDictMini, bpy_types=bpy_types_module_types)
+
+    mathutils = _module("mathutils", Vector=Vector, Matrix=Matrix)
+    mathutils.__all__ = ["Vector", "Matrix"]
+    nodeitems = _module("nodeitems_utils", NodeCategory=NodeCategory, NodeItem=NodeItem,
+                        register_node_categories=register_node_categories,
+                        unregister_node_categories=unregister_node_categories)
+
+    sys.modules.update({
+        "bpy": bpy,
+        "bpy.props": props,
+        "bpy.types": bpy_types_module_types,
+        "bpy.utils": utils,
+        "bpy.app": app,
+        "bpy.app.handlers": handlers,
+        "bpy_types": bpy_types,
+        "bmesh": _module("bmesh"),
+        "mathutils": mathutils,
+        "nodeitems_utils": nodeitems,
+        })
+    return bpy
+
+
+def load_framework(path=None, name="pynodes_framework"):
+    """Import the framework package from a source directory under its package name"""
+    if name in sys.modules:
+        return sys.modules[name]
+    if path is None:
+        path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    spec = importlib.util.spec_from_file_location(name, os.path.join(path, "__init__.py"),
+                                                  submodule_search_locations=[path])
+    package = importlib.util.module_from_spec(spec)
+    sys.modules[name] = package
+    spec.loader.exec_module(package)
+    return package
@@ -0,0 +1,324 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""Headless benchmarks of the pynodes framework hot paths.
+
+Runs outside of Blender using the fake_bpy stand-in modules:
+
+    python benchmarks/run.py --sizes 10 100 1000 10000 --output results.json
+    python benchmarks/run.py --compare results.json
+
+Results are written as JSON, --compare prints the timing ratio to an earlier result file.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import fake_bpy
+
+bpy = fake_bpy.install()
+fake_bpy.load_framework()
+
+from pynodes_framework import base, parameter, idref, category, execution, serialize, compiler
+from pynodes_framework.parameter import NodeParamFloat, NodeParamInt, NodeParamVector, NodeParamColor
+
+
+### Benchmark node types ###
+
+class BenchTree(bpy.types.NodeTree, base.NodeTree):
+    bl_idname = "BenchTree"
+    bl_label = "Benchmark"
+
+
+class BenchNode(bpy.types.Node, base.Node):
+    bl_idname = "BenchNode"
+    bl_label = "Bench"
+    socket_type = base.PyNodesSocket
+
+    input_a = NodeParamFloat("A")
+    input_b = NodeParamFloat("B")
+    factor = NodeParamFloat("Factor", use_socket=False)
+    result = NodeParamFloat("Result", is_output=True)
+
+    target = idref.IDRefProperty(name="Target")
+
+    def execute(self, context, inputs):
+        return {"result" : (inputs["input_a"] + inputs["input_b"]) * inputs["factor"]}
+
+    expressions = {"result" : "({input_a} + {input_b}) * {factor}"}
+
+
+def make_wide_node_class(name, count):
+    """Node class with count input sockets of mixed types and one output"""
+    classdict = base.NodeOrderedDict()
+    classdict["bl_idname"] = name
+    classdict["bl_label"] = name
+    classdict["socket_type"] = base.PyNodesSocket
+    types = [NodeParamFloat, NodeParamInt, NodeParamVector, NodeParamColor]
+    for i in range(count):
+        classdict["param_%d" % i] = types[i % len(types)]("Param %d" % i)
+    classdict["result"] = NodeParamFloat("Result", is_output=True)
+    return base.MetaNode(name, (bpy.types.Node, base.Node), classdict)
+
+
+def build_tree(size, seed=0):
+    """Random DAG of BenchNodes, every node links its inputs to random earlier nodes"""
+    rand = random.Random(seed)
+    tree = bpy.data.node_groups.new("Bench %d" % size, "BenchTree")
+    nodes = []
+    for i in range(size):
+        node = tree.nodes.new("BenchNode")
+        node.input_a = rand.random()
+        node.factor = 0.5
+        if nodes:
+            tree.links.new(rand.choice(nodes).outputs[0], node.inputs[0])
+        if len(nodes) > 1 and rand.random() < 0.5:
+            tree.links.new(rand.choice(nodes).outputs[0], node.inputs[1])
+        nodes.append(node)
+    return tree
+
+
+### Timing ###
+
+def measure(func, repeat, setup=None):
+    times = []
+    for i in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {"min" : min(times), "mean" : sum(times) / len(times), "repeat" : repeat}
+
+
+def bench_fixed(results, repeat):
+    """Benchmarks independent of tree size"""
+
+    counter = [0]
+    def create_classes():
+        for i in range(20):
+            counter[0] += 1
+            make_wide_node_class("BenchWide%d" % counter[0], 50)
+    results["metanode_create_20x50"] = measure(create_classes, repeat)
+
+    wide_cls = make_wide_node_class("BenchWide", 200)
+    bpy.utils.register_class(wide_cls)
+    tree = bpy.data.node_groups.new("Wide", "BenchTree")
+    node = tree.nodes.new("BenchWide")
+    rand = random.Random(0)
+
+    results["verify_sockets_200_ordered"] = measure(node._verify_sockets, repeat)
+
+    def scramble():
+        rand.shuffle(node.inputs.items)
+    results["verify_sockets_200_shuffled"] = measure(node._verify_sockets, repeat, setup=scramble)
+
+    def swap_pair():
+        items = node.inputs.items
+        items[10], items[150] = items[150], items[10]
+    results["verify_sockets_200_swapped"] = measure(node._verify_sockets, repeat, setup=swap_pair)
+
+    def clear_sockets():
+        node.inputs.clear()
+        node.outputs.clear()
+    results["verify_sockets_200_create"] = measure(node._verify_sockets, repeat, setup=clear_sockets)
+
+    node_classes = [make_wide_node_class("BenchCat%d" % i, 2) for i in range(500)]
+    def categorize():
+        categorizer = category.NodeCategorizer(BenchTree)
+        for i, cls in enumerate(node_classes):
+            categorizer("Category %d" % (i % 20))(cls)
+        categorizer.register()
+        categorizer.unregister()
+    results["categorizer_register_500"] = measure(categorize, repeat)
+
+    def access_templates():
+        for pt in parameter.parameter_types_all:
+            pt._template_type = None
+            pt.template_type
+    results["parameter_templates_generate"] = measure(access_templates, repeat)
+
+
+def bench_tree(results, size, repeat):
+    """Benchmarks on a synthetic tree with size nodes"""
+    prefix = "tree_%d_" % size
+
+    start = time.perf_counter()
+    tree = build_tree(size)
+    results[prefix + "build"] = {"min" : time.perf_counter() - start, "mean" : time.perf_counter() - start, "repeat" : 1}
+
+    target = bpy.data.objects.new("Target")
+    for i, node in enumerate(tree.nodes):
+        if i % 2:
+            node.target = target
+
+    results[prefix + "verify_all_noop"] = measure(tree.verify_all, repeat)
+
+    def change_layout():
+        BenchNode.extra = NodeParamFloat("Extra")
+    def restore_layout():
+        del BenchNode.extra
+        tree.verify_all()
+    results[prefix + "verify_all_changed"] = measure(lambda: (tree.verify_all(), restore_layout()), repeat, setup=change_layout)
+
+    def read_idrefs():
+        for node in tree.nodes:
+            node.target
+    results[prefix + "idref_get"] = measure(read_idrefs, repeat)
+    results[prefix + "idref_resolve_bulk"] = measure(tree.resolve_idrefs, repeat)
+
+    def recompile():
+        execution.tag_tree_changed(tree)
+        execution.get_plan(tree)
+    results[prefix + "plan_compile"] = measure(recompile, repeat)
+
+    plan = tree.execution_plan()
+    results[prefix + "evaluate_full"] = measure(plan.run, repeat, setup=plan.tag_all_dirty)
+
+    nodes = list(tree.nodes)
+    rand = random.Random(1)
+    def change_value():
+        rand.choice(nodes).input_b = rand.random()
+    results[prefix + "evaluate_one_changed"] = measure(plan.run, repeat, setup=change_value)
+    results[prefix + "evaluate_noop"] = measure(plan.run, repeat)
+
+    # link edits keep the incremental order, new links may reorder nodes or be rejected as cycles
+    free_inputs = [node.inputs[1] for node in nodes if not node.inputs[1].is_linked]
+    added = []
+    def add_link():
+        link = tree.links.new(rand.choice(nodes).outputs[0], rand.choice(free_inputs))
+        if link.to_socket.is_linked:
+            added.append(link)
+    def remove_added():
+        while added:
+            tree.links.remove(added.pop())
+    results[prefix + "link_add"] = measure(add_link, repeat, setup=remove_added)
+    def add_one():
+        remove_added()
+        add_link()
+    results[prefix + "link_remove"] = measure(remove_added, repeat, setup=add_one)
+    def add_two():
+        add_one()
+        add_link()
+    def relink():
+        # replace the link to an occupied input, not the last one
+        if added:
+            socket = added.pop(0).to_socket
+            link = tree.links.new(rand.choice(nodes).outputs[0], socket)
+            if socket.is_linked:
+                added.append(link)
+    results[prefix + "link_relink"] = measure(relink, repeat, setup=add_two)
+    remove_added()
+
+    def recompile_function():
+        execution.tag_tree_changed(tree)
+        compiler.compile_tree(tree)
+    results[prefix + "codegen_compile"] = measure(recompile_function, repeat)
+    compiled = compiler.compile_tree(tree)
+    args = [getattr(data, identifier) for data, identifier in compiled._constants]
+    results[prefix + "codegen_call"] = measure(lambda: compiled.function(None, *args), repeat)
+
+    data = serialize.dump_tree(tree)
+    results[prefix + "serialize_dump"] = measure(lambda: serialize.dump_tree(tree), repeat)
+    loaded = []
+    def load():
+        loaded.append(serialize.load_tree(data))
+    def remove_loaded():
+        while loaded:
+            bpy.data.node_groups.remove(loaded.pop())
+    results[prefix + "serialize_load"] = measure(load, repeat, setup=remove_loaded)
+    remove_loaded()
+
+    bpy.data.node_groups.remove(tree)
+    execution.free_plan(tree)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "describe", "--always", "--dirty"],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, reference):
+    print("%-45s %12s %12s %8s" % ("benchmark", "reference", "current", "ratio"))
+    for name, result in sorted(results.items()):
+        old = reference.get(name, None)
+        if old is None:
+            print("%-45s %12s %10.3fms %8s" % (name, "-", result["min"] * 1000.0, "-"))
+        else:
+            ratio = result["min"] / old["min"] if old["min"] else float("inf")
+            print("%-45s %10.3fms %10.3fms %7.2fx" % (name, old["min"] * 1000.0, result["min"] * 1000.0, ratio))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="JSON result file of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    bpy.utils.register_class(BenchTree)
+    bpy.utils.register_class(BenchNode)
+    base.register()
+    parameter.register()
+    idref.register()
+
+    results = {}
+    bench_fixed(results, args.repeat)
+    for size in args.sizes:
+        bench_tree(results, size, args.repeat)
+
+    report = {
+        "meta" : {
+            "revision" : git_revision(),
+            "python" : platform.python_version(),
+            "platform" : platform.platform(),
+            "time" : time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "sizes" : args.sizes,
+            "repeat" : args.repeat,
+            },
+        "results" : results,
+        }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f)["results"])
+    elif not args.output:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        print()
+
+
+if __name__ == "__main__":
+    main()
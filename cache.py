@@ -0,0 +1,122 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+import sys
+import hashlib
+from collections import OrderedDict
+
+
+def hashable_value(value):
+    """Convert property values (e.g. bpy_prop_array) into a stable hashable form"""
+    if isinstance(value, (str, bytes, int, float, bool, type(None))):
+        return value
+    if isinstance(value, (set, frozenset)):
+        # enum flag values, iteration order is arbitrary
+        return tuple(sorted(value))
+    try:
+        return tuple(hashable_value(item) for item in value)
+    except TypeError:
+        return value
+
+def content_key(node_type, values, upstream_keys, properties=()):
+    """Content address of a node result.
+
+    Built from the node type, the values of its unlinked inputs, the
+    content keys of the upstream outputs feeding its linked inputs and
+    the values of other node properties that execute reads.
+    """
+    data = repr((node_type, tuple(hashable_value(value) for value in values), tuple(upstream_keys),
+                 tuple(hashable_value(value) for value in properties)))
+    return hashlib.blake2b(data.encode(), digest_size=16).digest()
+
+def value_size(outputs):
+    """Approximate memory size of a node result dict in bytes"""
+    size = 0
+    for value in outputs.values():
+        nbytes = getattr(value, "nbytes", None)
+        size += nbytes if nbytes is not None else sys.getsizeof(value)
+    return size
+
+
+class OutputCache():
+    """LRU cache of node results by content key.
+
+    Can be shared between trees and evaluations. Eviction happens when
+    either max_entries or max_bytes is exceeded, None means unlimited.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict() # key -> (outputs, size)
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        entry = self.entries.get(key, None)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, outputs):
+        size = value_size(outputs)
+        if self.max_bytes is not None and size > self.max_bytes:
+            # would evict everything else without ever being hit
+            return
+
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.total_bytes -= old[1]
+        self.entries[key] = (outputs, size)
+        self.total_bytes += size
+
+        while self.entries and ((self.max_entries is not None and len(self.entries) > self.max_entries) or
+                                (self.max_bytes is not None and self.total_bytes > self.max_bytes)):
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.total_bytes -= evicted_size
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.total_bytes = 0
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries" : len(self.entries),
+            "bytes" : self.total_bytes,
+            "hits" : self.hits,
+            "misses" : self.misses,
+            "evictions" : self.evictions,
+            "hit_rate" : self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,116 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""Compilation of node trees into a single generated python function.
+
+Nodes can provide expression templates for their outputs, which are inlined
+into the generated code instead of calling execute:
+
+    expressions = {"result" : "{input_a} + {input_b}"}
+
+Placeholders are input identifiers, literal braces have to be doubled.
+Every socket value becomes a local variable of the function, nodes without
+expressions are called through their execute method.
+
+    compiled = compile_tree(tree)
+    compiled.function(context, *args)   # raw function, args in compiled.arguments order
+    compiled.evaluate()                 # reads the unlinked socket values
+
+Compiled functions are cached together with the execution plan of the tree,
+so they are rebuilt only when the tree revision changes.
+"""
+
+from pynodes_framework.execution import ExecutionContext, get_plan
+from pynodes_framework.idref import resolve_idrefs
+
+
+class CompiledTree():
+    """Generated python function evaluating a whole node tree"""
+
+    def __init__(self, plan):
+        self.plan = plan
+        # (node name, identifier) of unlinked inputs, in function argument order
+        self.arguments = tuple((step.name, identifier) for step in plan.steps for slot, data, identifier in step.constants)
+        self._constants = tuple((data, identifier) for step in plan.steps for slot, data, identifier in step.constants)
+        self._idref_nodes = tuple(step.node for step in plan.steps if step.has_idrefs)
+
+        # outputs of nodes that don't feed any other node
+        self.results = tuple((step.name, identifier) for i, step in enumerate(plan.steps) if not plan.downstream[i]
+                             for identifier, slot in step.outputs) + tuple(plan.folded_results)
+
+        self.inlined = 0
+        self.source, namespace = self._generate()
+        code = compile(self.source, "<pynodes tree %r>" % plan.tree.name, "exec")
+        exec(code, namespace)
+        self.function = namespace["compiled_tree"]
+
+    def _generate(self):
+        plan = self.plan
+        namespace = {}
+        arguments = ["context"] + ["v%d" % slot for step in plan.steps for slot, data, identifier in step.constants]
+        lines = ["def compiled_tree(%s):" % ", ".join(arguments)]
+
+        # values folded while compiling the plan
+        used = { slot for step in plan.steps for identifier, slot in step.inputs }
+        used.update(plan.slots[key] for key in plan.folded_results)
+        for slot in sorted(used.intersection(plan.literals)):
+            namespace["literal_%d" % slot] = plan.values[slot]
+            lines.append("    v%d = literal_%d" % (slot, slot))
+
+        for i, step in enumerate(plan.steps):
+            expressions = getattr(step.node, "expressions", None)
+            variables = { identifier : "v%d" % slot for identifier, slot in step.inputs }
+
+            if expressions and not step.lazy_inputs and all(identifier in expressions for identifier, slot in step.outputs):
+                for identifier, slot in step.outputs:
+                    lines.append("    v%d = (%s)" % (slot, expressions[identifier].format(**variables)))
+                self.inlined += 1
+            else:
+                namespace["execute_%d" % i] = step.execute
+                # lazy inputs are computed anyway, but nodes expect a function
+                for identifier in step.lazy_inputs:
+                    variables[identifier] = "(lambda: %s)" % variables[identifier]
+                inputs = ", ".join("%r : %s" % (identifier, variable) for identifier, variable in variables.items())
+                lines.append("    result = execute_%d(context, {%s})" % (i, inputs))
+                for identifier, slot in step.outputs:
+                    lines.append("    v%d = result.get(%r, None)" % (slot, identifier))
+
+        results = ["v%d" % plan.slots[key] for key in self.results]
+        lines.append("    return (%s)" % "".join(result + ", " for result in results))
+        return "\n".join(lines) + "\n", namespace
+
+    def evaluate(self, context=None):
+        """Run the function on the current socket values, returns a dict of the results"""
+        if context is None:
+            context = ExecutionContext(self.plan.tree, self.plan)
+        if self._idref_nodes:
+            context.idrefs = resolve_idrefs(self._idref_nodes)
+        values = self.function(context, *[getattr(data, identifier) for data, identifier in self._constants])
+        return dict(zip(self.results, values))
+
+
+def compile_tree(tree):
+    """Compiled function of a tree, shares the invalidation of the execution plan"""
+    plan = get_plan(tree)
+    compiled = getattr(plan, "compiled_tree", None)
+    if compiled is None:
+        compiled = CompiledTree(plan)
+        plan.compiled_tree = compiled
+    return compiled
@@ -0,0 +1,746 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+import bpy
+from bpy.app.handlers import persistent
+from collections import deque
+from pynodes_framework.cache import content_key, hashable_value
+from pynodes_framework.idref import resolve_idrefs
+from pynodes_framework.topology import NodeTreeCycleError, get_topology, free_topology, free_all_topologies, free_removed_topologies
+
+
+def is_executable_node(node):
+    # only pynodes framework nodes take part in evaluation
+    return hasattr(node, "_node_parameter_tables") and hasattr(node, "execute")
+
+def is_reroute_node(node):
+    return node.bl_idname == "NodeReroute"
+
+
+class NodeTreeLinkError(Exception):
+    """A node input is linked to a node that can't be evaluated"""
+    pass
+
+
+def tree_dependencies(tree):
+    """Collect executable nodes and link sources of a node tree.
+
+    Returns the list of nodes and a dict mapping (node name, input identifier)
+    to the (node name, output identifier) of the linked output socket.
+    Links through reroute nodes are followed to the node producing the value.
+    """
+    nodes = [node for node in tree.nodes if is_executable_node(node)]
+    names = { node.name for node in nodes }
+
+    # reroute node name -> link into the reroute
+    reroute_links = {}
+    for link in tree.links:
+        if link.is_valid and is_reroute_node(link.to_node):
+            reroute_links[link.to_node.name] = link
+
+    sources = {}
+    for link in tree.links:
+        if not link.is_valid:
+            continue
+        to_node = link.to_node
+        if to_node.name not in names:
+            continue
+
+        from_node, from_socket = link.from_node, link.from_socket
+        visited = set()
+        while is_reroute_node(from_node):
+            if from_node.name in visited:
+                raise NodeTreeCycleError("Dependency cycle between reroute nodes %s" % ", ".join(repr(name) for name in sorted(visited)))
+            visited.add(from_node.name)
+            reroute_link = reroute_links.get(from_node.name, None)
+            if reroute_link is None:
+                break
+            from_node, from_socket = reroute_link.from_node, reroute_link.from_socket
+
+        if from_node.name not in names:
+            if is_reroute_node(from_node):
+                # dangling reroute, the input keeps its own value
+                continue
+            raise NodeTreeLinkError("Input %r of node %r is linked to node %r, which can't be evaluated"
+                                    % (link.to_socket.identifier, to_node.name, from_node.name))
+        sources[(to_node.name, link.to_socket.identifier)] = (from_node.name, from_socket.identifier)
+
+    return nodes, sources
+
+
+def topological_sort(nodes, sources):
+    """Sort nodes so that every node comes after all nodes it depends on.
+
+    Ties keep the original node order. Raises NodeTreeCycleError if the
+    dependencies contain a cycle.
+    """
+    order = { node.name : i for i, node in enumerate(nodes) }
+    upstream = { node.name : set() for node in nodes }
+    downstream = { node.name : [] for node in nodes }
+    for (to_name, _), (from_name, _) in sources.items():
+        if from_name not in upstream[to_name]:
+            upstream[to_name].add(from_name)
+            downstream[from_name].append(to_name)
+
+    pending = { name : len(deps) for name, deps in upstream.items() }
+    ready = deque(node for node in nodes if not pending[node.name])
+    result = []
+    while ready:
+        node = ready.popleft()
+        result.append(node)
+        for name in sorted(downstream[node.name], key=order.get):
+            pending[name] -= 1
+            if not pending[name]:
+                ready.append(nodes[order[name]])
+
+    if len(result) != len(nodes):
+        cyclic = sorted(name for name, count in pending.items() if count)
+        raise NodeTreeCycleError("Dependency cycle between nodes %s" % ", ".join(repr(name) for name in cyclic))
+    return result
+
+
+def maintained_order(tree, nodes, sources):
+    """Nodes in the incremental order of the tree topology.
+
+    Returns None if the topology is out of sync with the tree.
+    """
+    topology = get_topology(tree, tree_revision(tree))
+    if topology is None:
+        return None
+    by_name = { node.name : node for node in nodes }
+    result = [by_name[name] for name in topology.order.order() if name in by_name]
+    position = { node.name : i for i, node in enumerate(result) }
+    # renaming nodes or changing links in place doesn't update the tree
+    if len(result) != len(nodes) or any(position[from_name] > position[to_name]
+                                        for (to_name, _), (from_name, _) in sources.items()):
+        topology.resync = True
+        return None
+    return result
+
+
+def eliminate_dead_nodes(nodes, sources):
+    """Nodes that output nodes depend on, in the original order.
+
+    Output nodes are marked with the is_output_node class attribute.
+    Trees without output nodes are returned unchanged.
+    """
+    roots = [node.name for node in nodes if getattr(node, "is_output_node", False)]
+    if not roots:
+        return nodes
+
+    upstream = {}
+    for (to_name, _), (from_name, _) in sources.items():
+        upstream.setdefault(to_name, []).append(from_name)
+
+    live = set()
+    pending = roots
+    while pending:
+        name = pending.pop()
+        if name not in live:
+            live.add(name)
+            pending.extend(upstream.get(name, ()))
+    return [node for node in nodes if node.name in live]
+
+
+def eliminate_common_nodes(nodes, sources):
+    """Merge structurally identical pure nodes.
+
+    Nodes are identical if they have the same type, the same unlinked input
+    values, the same values of other RNA properties (e.g. an operation enum
+    read by execute) and the same link sources, after merging upstream nodes. nodes must
+    be in topological order. Returns the remaining nodes, the sources with links
+    from merged nodes redirected to the kept node, and a dict mapping the names
+    of all nodes in merged groups to the name of the kept node.
+    """
+    canonical = {} # merged node name -> kept node name
+    kept = {} # canonical key -> kept node name
+    remaining = []
+    for node in nodes:
+        if not getattr(node, "execute_pure", True) or getattr(node, "_idref_idtypes", None) or getattr(node, "is_output_node", False):
+            remaining.append(node)
+            continue
+
+        data = node.socket_data()
+        entries = []
+        for param in node.node_parameters(False):
+            source = sources.get((node.name, param.identifier), None)
+            if source is not None:
+                entries.append((param.identifier, canonical.get(source[0], source[0]), source[1]))
+            else:
+                entries.append((param.identifier, hashable_value(getattr(data, param.identifier))))
+        properties = tuple(hashable_value(getattr(node, attr)) for attr in getattr(node, "_node_property_names", ()))
+        key = (node.bl_idname, tuple(entries), properties)
+        try:
+            name = kept.setdefault(key, node.name)
+        except TypeError:
+            # unhashable values, never merged
+            name = node.name
+
+        if name == node.name:
+            remaining.append(node)
+        else:
+            canonical[node.name] = name
+
+    merged = {}
+    for name, kept_name in canonical.items():
+        merged[name] = kept_name
+        merged[kept_name] = kept_name
+    if canonical:
+        sources = { target : (canonical.get(source[0], source[0]), source[1])
+                    for target, source in sources.items() if target[0] not in canonical }
+    return remaining, sources, merged
+
+
+class ExecutionContext():
+    """Evaluation state passed to Node.execute"""
+
+    def __init__(self, tree, plan):
+        self.tree = tree
+        self.plan = plan
+        self.frame = None
+        # (node, attr) -> ID of IDRef properties, resolved in bulk before executing nodes
+        self.idrefs = {}
+
+
+def wrap_lazy_inputs(step, inputs):
+    """Pass lazy inputs of a step as functions returning the value"""
+    for identifier in step.lazy_inputs:
+        value = inputs[identifier]
+        inputs[identifier] = lambda value=value: value
+    return inputs
+
+
+class ExecutionStep():
+    """Node callback with its input and output value slots"""
+
+    def __init__(self, node, inputs, outputs, constants, sources):
+        self.node = node
+        self.name = node.name
+        # names of removed nodes get reused, the pointer tells nodes apart
+        self.pointer = node.as_pointer()
+        self.bl_idname = node.bl_idname
+        self.execute = node.execute
+        self.pure = getattr(node, "execute_pure", True)
+        self.has_idrefs = bool(getattr(node, "_idref_idtypes", None))
+        self.lazy_inputs = frozenset(getattr(node, "lazy_inputs", ()))
+        self.time_dependent = getattr(node, "time_dependent", False)
+        # RNA properties besides parameters, part of the content key
+        self.property_names = getattr(node, "_node_property_names", ())
+        # tuples of (parameter identifier, value slot)
+        self.inputs = inputs
+        self.outputs = outputs
+        # tuple of (slot, data, identifier) for unlinked inputs
+        self.constants = constants
+        # link source (node name, identifier) or None for each input
+        self.sources = sources
+
+
+class ExecutionPlan():
+    """Flat, precompiled evaluation order of a node tree.
+
+    All socket values live in a single slot-indexed list. Outputs have a slot
+    each, linked inputs share the slot of their source output and unlinked
+    inputs get a constant slot that is loaded from the node's socket data.
+
+    Values are kept between runs: only steps tagged dirty are executed,
+    tagging a step also tags everything downstream of it.
+
+    With optimize enabled, nodes that don't reach an output node are left out
+    and pure nodes depending only on unlinked inputs are executed once while
+    compiling. Their output values are kept as literals, changing one of their
+    inputs tags the tree for compiling again.
+    """
+
+    def __init__(self, tree, previous=None, optimize=False):
+        self.tree = tree
+        # tells trees apart when a pointer is reused
+        self.tree_name = tree.name
+        nodes, sources = tree_dependencies(tree)
+        # node pointer -> name of all executable nodes, renaming doesn't update the tree
+        self.node_names = { node.as_pointer() : node.name for node in nodes }
+        # the order maintained on link edits, if the tree didn't change without an update
+        ordered = maintained_order(tree, nodes, sources)
+        nodes = ordered if ordered is not None else topological_sort(nodes, sources)
+        # node counts of the optimization passes
+        self.report = {"nodes" : len(nodes), "dead" : 0, "merged" : 0, "folded" : 0}
+        # node name -> kept node name for all nodes of merged groups
+        self.merged = {}
+        if optimize:
+            live_nodes = eliminate_dead_nodes(nodes, sources)
+            self.report["dead"] = len(nodes) - len(live_nodes)
+            nodes = live_nodes
+
+            unique_nodes, sources, self.merged = eliminate_common_nodes(nodes, sources)
+            self.report["merged"] = len(nodes) - len(unique_nodes)
+            nodes = unique_nodes
+
+        self.slots = {} # (node name, identifier) -> slot for all outputs
+        self.constants = [] # (slot, data, identifier) of all unlinked inputs
+        self.steps = []
+        self.step_index = { node.name : i for i, node in enumerate(nodes) }
+
+        def new_slot():
+            return len(self.slots) + len(self.constants)
+
+        for node in nodes:
+            for param in node.node_parameters(True):
+                self.slots[(node.name, param.identifier)] = new_slot()
+
+        for node in nodes:
+            data = node.socket_data()
+            inputs = []
+            constants = []
+            input_sources = []
+            for param in node.node_parameters(False):
+                source = sources.get((node.name, param.identifier), None)
+                if source is not None and source in self.slots:
+                    slot = self.slots[source]
+                else:
+                    source = None
+                    slot = new_slot()
+                    constants.append((slot, data, param.identifier))
+                    self.constants.append((slot, data, param.identifier))
+                inputs.append((param.identifier, slot))
+                input_sources.append(source)
+            outputs = [(param.identifier, self.slots[(node.name, param.identifier)]) for param in node.node_parameters(True)]
+            self.steps.append(ExecutionStep(node, tuple(inputs), tuple(outputs), tuple(constants), tuple(input_sources)))
+
+        self.values = [None] * new_slot()
+
+        # merged nodes share the output slots of the kept node
+        for name, kept_name in self.merged.items():
+            if name != kept_name:
+                for param in self.steps[self.step_index[kept_name]].node.node_parameters(True):
+                    self.slots[(name, param.identifier)] = self.slots[(kept_name, param.identifier)]
+
+        self.dirty = [True] * len(self.steps)
+        # content keys of step results, only maintained when evaluating with a cache
+        self.content_keys = [None] * len(self.steps)
+
+        # folded node name -> indices of remaining steps using its values
+        self.folded = {}
+        # slot -> (node, output identifier) of folded values
+        self.literals = {}
+        # (node name, identifier) of folded outputs that no other node uses
+        self.folded_results = []
+        if optimize:
+            self._fold_constants()
+
+        # step indices consuming the outputs of each step
+        self.downstream = [[] for step in self.steps]
+        for i, step in enumerate(self.steps):
+            for j in { self.step_index[source[0]] for source in step.sources if source is not None }:
+                self.downstream[j].append(i)
+
+        # number of dirty tags, lets background evaluation notice changes
+        self.changes = 0
+
+        if previous is not None:
+            self._reuse_values(previous)
+
+    def _fold_constants(self):
+        context = ExecutionContext(self.tree, self)
+        # folded node name -> names of folded nodes it depends on, including itself
+        folded_upstream = {}
+
+        for i, step in enumerate(self.steps):
+            if not step.pure or step.has_idrefs or step.time_dependent or getattr(step.node, "is_output_node", False):
+                continue
+            if any(source is not None and source[0] not in folded_upstream for source in step.sources):
+                continue
+
+            self._execute_step(i, context)
+            for identifier, slot in step.outputs:
+                self.literals[slot] = (step.node, identifier)
+
+            names = { step.name }
+            for source in step.sources:
+                if source is not None:
+                    names |= folded_upstream[source[0]]
+            folded_upstream[step.name] = names
+
+        if not folded_upstream:
+            return
+
+        used = { source[0] for step in self.steps for source in step.sources if source is not None }
+        self.folded_results = [(step.name, identifier) for step in self.steps if step.name in folded_upstream and step.name not in used
+                               for identifier, slot in step.outputs]
+
+        # folded values become unlinked inputs of the remaining steps
+        self.steps = [step for step in self.steps if step.name not in folded_upstream]
+        self.step_index = { step.name : i for i, step in enumerate(self.steps) }
+        self.dirty = [True] * len(self.steps)
+        self.content_keys = [None] * len(self.steps)
+        self.constants = [constant for step in self.steps for constant in step.constants]
+        self.folded = { name : set() for name in folded_upstream }
+        for i, step in enumerate(self.steps):
+            sources = []
+            for source in step.sources:
+                if source is not None and source[0] in folded_upstream:
+                    for name in folded_upstream[source[0]]:
+                        self.folded[name].add(i)
+                    source = None
+                sources.append(source)
+            step.sources = tuple(sources)
+        self.report["folded"] = len(folded_upstream)
+
+    def _reuse_values(self, previous):
+        # Keep outputs of nodes which are unaffected by a structural change:
+        # same node and input links, clean in the previous plan and only clean upstream nodes.
+        for i, step in enumerate(self.steps):
+            j = previous.step_index.get(step.name, None)
+            if j is None or previous.dirty[j]:
+                continue
+            prev_step = previous.steps[j]
+            if prev_step.pointer != step.pointer or prev_step.bl_idname != step.bl_idname or prev_step.sources != step.sources:
+                continue
+            if [identifier for identifier, _ in prev_step.outputs] != [identifier for identifier, _ in step.outputs]:
+                continue
+            if any(self.dirty[self.step_index[source[0]]] for source in step.sources if source is not None):
+                continue
+            # folded values are computed again with the new plan
+            if any(slot in self.literals for identifier, slot in step.inputs):
+                continue
+            for (identifier, slot), (_, prev_slot) in zip(step.outputs, prev_step.outputs):
+                self.values[slot] = previous.values[prev_slot]
+            self.dirty[i] = False
+
+    def tag_dirty(self, node_name):
+        """Tag a node and everything downstream of it for re-execution"""
+        self.changes += 1
+        kept_name = self.merged.get(node_name, None)
+        if kept_name is not None:
+            # merged nodes may not be identical anymore, compile again
+            tag_tree_changed(self.tree)
+            node_name = kept_name
+        index = self.step_index.get(node_name, None)
+        if index is None:
+            consumers = self.folded.get(node_name, None)
+            if consumers is not None:
+                # folded values depend on the changed node, compile again
+                for i in consumers:
+                    self._tag_step_dirty(i)
+                tag_tree_changed(self.tree)
+            return
+        self._tag_step_dirty(index)
+
+    def _tag_step_dirty(self, index):
+        # downstream of a dirty step is dirty already, except for consumers of lazy
+        # inputs cleaned by a pull without calling them. They don't use the value.
+        if self.dirty[index]:
+            return
+        dirty = self.dirty
+        downstream = self.downstream
+        dirty[index] = True
+        pending = [index]
+        while pending:
+            for j in downstream[pending.pop()]:
+                if not dirty[j]:
+                    dirty[j] = True
+                    pending.append(j)
+
+    def tag_all_dirty(self):
+        self.changes += 1
+        self.dirty = [True] * len(self.steps)
+
+    def _content_key(self, step, values):
+        # IDRef targets are not part of the input values
+        if not step.pure or step.has_idrefs or step.time_dependent:
+            return None
+        upstream_keys = []
+        # unlinked inputs, including folded values
+        input_values = []
+        for (identifier, slot), source in zip(step.inputs, step.sources):
+            if source is None:
+                input_values.append(values[slot])
+                continue
+            key = self.content_keys[self.step_index[source[0]]]
+            if key is None:
+                return None
+            upstream_keys.append((key, source[1]))
+        properties = [getattr(step.node, attr) for attr in step.property_names]
+        return content_key(step.bl_idname, input_values, upstream_keys, properties)
+
+    def resolve_idrefs(self, context):
+        """Snapshot IDRef properties of all dirty nodes in the context"""
+        context.idrefs = resolve_idrefs(step.node for i, step in enumerate(self.steps) if step.has_idrefs and self.dirty[i])
+
+    def step_inputs(self, i, values, load_constants=True):
+        """Input dict of step i, unlinked input values are read from the socket data first.
+
+        Reading socket data accesses RNA, workers pass load_constants=False
+        and use values loaded on the main thread.
+        """
+        step = self.steps[i]
+        if load_constants:
+            for slot, data, identifier in step.constants:
+                values[slot] = getattr(data, identifier)
+        return { identifier : values[slot] for identifier, slot in step.inputs }
+
+    def store_outputs(self, i, result, values):
+        """Write the result dict of step i to its output slots"""
+        for identifier, slot in self.steps[i].outputs:
+            values[slot] = result.get(identifier, None)
+
+    def finish_step(self, i, key=None):
+        """Mark step i clean, key is the content key of its result if it was cached"""
+        self.dirty[i] = False
+        self.content_keys[i] = key
+
+    def _execute_step(self, i, context, inputs_hook=wrap_lazy_inputs, cache=None):
+        # inputs_hook(step, inputs) prepares lazy inputs, by default they return their value
+        step = self.steps[i]
+        values = self.values
+        inputs = self.step_inputs(i, values)
+        if step.lazy_inputs:
+            inputs_hook(step, inputs)
+
+        key = self._content_key(step, values) if cache is not None else None
+        result = cache.get(key) if key is not None else None
+        if result is None:
+            result = step.execute(context, inputs)
+            if key is not None:
+                cache.put(key, result)
+
+        self.store_outputs(i, result, values)
+        self.finish_step(i, key)
+
+    def run(self, context=None, cache=None):
+        """Evaluate all dirty nodes, returns the slot value list.
+
+        With an OutputCache, results of pure nodes are looked up by content key
+        before executing them.
+        """
+        if context is None:
+            context = ExecutionContext(self.tree, self)
+        dirty = self.dirty
+        self.resolve_idrefs(context)
+
+        for i in range(len(self.steps)):
+            if dirty[i]:
+                self._execute_step(i, context, cache=cache)
+
+        return self.values
+
+    def pull(self, node_name, identifier, context=None):
+        """Evaluate only the dirty nodes an output socket depends on, returns its value.
+
+        Lazy inputs are passed as functions that evaluate their upstream nodes
+        when called, branches that are never called stay dirty. Their consumers
+        are clean nonetheless, so after a pull a dirty step can have clean
+        steps downstream.
+        """
+        if context is None:
+            context = ExecutionContext(self.tree, self)
+        node_name = self.compiled_name(node_name)
+        index = self.step_index.get(self.merged.get(node_name, node_name), None)
+        # folded nodes have no step, their values are always up to date
+        if index is not None and self.dirty[index]:
+            self._pull_step(index, context)
+        return self.values[self.slots[(node_name, identifier)]]
+
+    def _pull_step(self, index, context):
+        steps = self.steps
+        dirty = self.dirty
+
+        # dirty steps needed through non-lazy inputs
+        needed = set()
+        pending = [index]
+        while pending:
+            i = pending.pop()
+            if i in needed or not dirty[i]:
+                continue
+            needed.add(i)
+            step = steps[i]
+            for (identifier, slot), source in zip(step.inputs, step.sources):
+                if source is not None and identifier not in step.lazy_inputs:
+                    pending.append(self.step_index[source[0]])
+
+        needed = sorted(needed)
+        context.idrefs.update(resolve_idrefs(steps[i].node for i in needed if steps[i].has_idrefs))
+
+        def pull_lazy_inputs(step, inputs):
+            # linked lazy inputs evaluate their upstream nodes when called
+            for (identifier, slot), source in zip(step.inputs, step.sources):
+                if identifier in step.lazy_inputs:
+                    if source is None:
+                        value = inputs[identifier]
+                        inputs[identifier] = lambda value=value: value
+                    else:
+                        inputs[identifier] = lambda source=source: self.pull(source[0], source[1], context)
+
+        # step order is topological
+        for i in needed:
+            self._execute_step(i, context, pull_lazy_inputs)
+
+    def time_varying_steps(self):
+        """Indices of steps depending on the frame: time dependent nodes and everything downstream"""
+        varying = [False] * len(self.steps)
+        # step order is topological, upstream steps are classified first
+        for i, step in enumerate(self.steps):
+            varying[i] = step.time_dependent or any(varying[self.step_index[source[0]]] for source in step.sources if source is not None)
+        return [i for i, is_varying in enumerate(varying) if is_varying]
+
+    def _execute_steps(self, indices, context):
+        for i in indices:
+            self._execute_step(i, context)
+
+    def stream_frames(self, frames, outputs=None, context=None):
+        """Generator evaluating the plan for each frame, yields (frame, {(node name, identifier) : value}).
+
+        outputs defaults to the outputs of nodes that don't feed other nodes.
+        Steps that don't depend on the frame are executed once before the first
+        frame, only time dependent nodes and their downstream run per frame.
+        Nothing is accumulated, memory use doesn't depend on the frame range.
+        """
+        if context is None:
+            context = ExecutionContext(self.tree, self)
+        if outputs is None:
+            outputs = [(step.name, identifier) for i, step in enumerate(self.steps) if not self.downstream[i]
+                       for identifier, slot in step.outputs]
+        output_slots = [(key, self.slots[(self.compiled_name(key[0]), key[1])]) for key in outputs]
+        values = self.values
+
+        varying = self.time_varying_steps()
+        is_varying = set(varying)
+        context.idrefs = resolve_idrefs(step.node for i, step in enumerate(self.steps)
+                                        if step.has_idrefs and (self.dirty[i] or i in is_varying))
+        self._execute_steps([i for i in range(len(self.steps)) if self.dirty[i] and i not in is_varying], context)
+
+        try:
+            for frame in frames:
+                context.frame = frame
+                self._execute_steps(varying, context)
+                yield frame, { key : values[slot] for key, slot in output_slots }
+        finally:
+            # per frame values are not valid for regular evaluation
+            for i in varying:
+                self.dirty[i] = True
+
+    def output_value(self, node_name, identifier):
+        """Value of an output socket from the last run"""
+        return self.values[self.slots[(self.compiled_name(node_name), identifier)]]
+
+    def compiled_name(self, node_name):
+        """Name a node had when the plan was compiled, nodes may be renamed since"""
+        node = self.tree.nodes.get(node_name, None)
+        if node is None:
+            return node_name
+        return self.node_names.get(node.as_pointer(), node_name)
+
+
+# Compiled plans, keyed by tree pointer.
+# Entries are (revision, plan), the revision is bumped whenever the tree changes.
+# Outdated plans are kept until the next compile to reuse unaffected node values.
+_tree_plans = {}
+_tree_revisions = {}
+
+def tree_revision(tree):
+    return _tree_revisions.get(tree.as_pointer(), 0)
+
+def tag_tree_changed(tree):
+    """Invalidate the compiled plan of a tree after nodes or links changed"""
+    key = tree.as_pointer()
+    _tree_revisions[key] = _tree_revisions.get(key, 0) + 1
+
+def tag_node_changed(data):
+    """Tag the node owning changed socket data as dirty"""
+    entry = _tree_plans.get(data.id_data.as_pointer(), None)
+    if entry is None:
+        return
+    plan = entry[1]
+    if is_executable_node(data):
+        name = plan.node_names.get(data.as_pointer(), None)
+        if name is not None:
+            plan.tag_dirty(name)
+        if name != data.name:
+            # node added or renamed since compiling, steps are looked up by name
+            tag_tree_changed(data.id_data)
+    else:
+        # custom socket data, owner node is unknown
+        plan.tag_all_dirty()
+
+def get_plan(tree):
+    """Compiled execution plan of a tree, recompiled only after changes"""
+    key = tree.as_pointer()
+    entry = _tree_plans.get(key, None)
+    if entry is not None and entry[1].tree_name != tree.name:
+        # renamed, or a removed tree's pointer is reused: its nodes may be freed
+        free_plan(tree)
+        entry = None
+    revision = _tree_revisions.get(key, 0)
+    if entry is None or entry[0] != revision:
+        previous = entry[1] if entry is not None else None
+        entry = (revision, ExecutionPlan(tree, previous, getattr(tree, "optimize_execution", False)))
+        _tree_plans[key] = entry
+    return entry[1]
+
+def free_plan(tree):
+    key = tree.as_pointer()
+    _tree_plans.pop(key, None)
+    _tree_revisions.pop(key, None)
+    free_topology(tree)
+
+def free_all_plans():
+    _tree_plans.clear()
+    _tree_revisions.clear()
+    free_all_topologies()
+
+def free_removed_plans():
+    """Free plans of node trees that don't exist anymore"""
+    existing = { tree.as_pointer() for tree in bpy.data.node_groups }
+    for key in [key for key in _tree_plans if key not in existing]:
+        del _tree_plans[key]
+    for key in [key for key in _tree_revisions if key not in existing]:
+        del _tree_revisions[key]
+    free_removed_topologies(existing)
+
+@persistent
+def execution_load_handler(*args):
+    # Plans hold references to trees of the previous file and pointers may be reused.
+    # Undo and redo reallocate all data as well.
+    free_all_plans()
+
+@persistent
+def execution_update_handler(*args):
+    # removing a node group doesn't tell its node tree
+    free_removed_plans()
+
+def _execution_handler_lists():
+    handlers = bpy.app.handlers
+    # depsgraph_update_post replaces scene_update_post in newer Blender versions
+    update = getattr(handlers, "depsgraph_update_post", None)
+    if update is None:
+        update = handlers.scene_update_post
+    return [(handlers.load_post, execution_load_handler),
+            (handlers.undo_post, execution_load_handler),
+            (handlers.redo_post, execution_load_handler),
+            (update, execution_update_handler)]
+
+def register():
+    for handler_list, handler in _execution_handler_lists():
+        if handler not in handler_list:
+            handler_list.append(handler)
+
+def unregister():
+    for handler_list, handler in _execution_handler_lists():
+        if handler in handler_list:
+            handler_list.remove(handler)
+    free_all_plans()
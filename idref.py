@@ -19,42 +19,44 @@
 # <pep8 compliant>
 
 import bpy
+from bpy.app.handlers import persistent
 from bpy_types import RNAMetaPropGroup
 
+_idtype_list_props = {
+    'ACTION'            : 'actions',
+    'ARMATURE'          : 'armatures',
+    'BRUSH'             : 'brushes',
+    'CAMERA'            : 'cameras',
+    'CURVE'             : 'curves',
+    'FONT'              : 'fonts',
+    'GREASE_PENCIL'     : 'grease_pencil',
+    'GROUP'             : 'groups',
+    'IMAGE'             : 'images',
+    'LAMP'              : 'lamps',
+    'LATTICE'           : 'lattices',
+    'LIBRARY'           : 'libraries',
+    'MASK'              : 'masks',
+    'MATERIAL'          : 'materials',
+    'MESH'              : 'meshes',
+    'METABALL'          : 'metaballs',
+    'MOVIECLIP'         : 'movieclips',
+    'NODE_GROUP'        : 'node_groups',
+    'OBJECT'            : 'objects',
+    'PARTICLES'         : 'particles',
+    'SCENE'             : 'scenes',
+    'SCREEN'            : 'screens',
+    'SCRIPT'            : 'scripts',
+    'SHAPE_KEY'         : 'shape_keys',
+    'SOUND'             : 'sounds',
+    'SPEAKER'           : 'speakers',
+    'TEXT'              : 'texts',
+    'TEXTURE'           : 'textures',
+    'WINDOW_MANAGER'    : 'window_managers',
+    'WORLD'             : 'worlds',
+    }
+
 def get_idtype_list_prop(idtype):
-    typemap = {
-        'ACTION'            : 'actions',
-        'ARMATURE'          : 'armatures',
-        'BRUSH'             : 'brushes',
-        'CAMERA'            : 'cameras',
-        'CURVE'             : 'curves',
-        'FONT'              : 'fonts',
-        'GREASE_PENCIL'     : 'grease_pencil',
-        'GROUP'             : 'groups',
-        'IMAGE'             : 'images',
-        'LAMP'              : 'lamps',
-        'LATTICE'           : 'lattices',
-        'LIBRARY'           : 'libraries',
-        'MASK'              : 'masks',
-        'MATERIAL'          : 'materials',
-        'MESH'              : 'meshes',
-        'METABALL'          : 'metaballs',
-        'MOVIECLIP'         : 'movieclips',
-        'NODE_GROUP'        : 'node_groups',
-        'OBJECT'            : 'objects',
-        'PARTICLES'         : 'particles',
-        'SCENE'             : 'scenes',
-        'SCREEN'            : 'screens',
-        'SCRIPT'            : 'scripts',
-        'SHAPE_KEY'         : 'shape_keys',
-        'SOUND'             : 'sounds',
-        'SPEAKER'           : 'speakers',
-        'TEXT'              : 'texts',
-        'TEXTURE'           : 'textures',
-        'WINDOW_MANAGER'    : 'window_managers',
-        'WORLD'             : 'worlds',
-        }
-    return typemap[idtype]
+    return _idtype_list_props[idtype]
 
 def get_id_path(p):
     pid = p.id_data
@@ -70,6 +72,62 @@ def get_idtype_list(idtype):
     prop = get_idtype_list_prop(idtype)
     return lambda: getattr(bpy.data, prop, [])
 
+# Cached ID lookups: (idtype, name) -> (generation, ID)
+# Entries from older generations are ignored, the generation is bumped
+# whenever IDs may have been added, removed or renamed.
+# Failed lookups are not cached, the ID may be created at any time.
+_id_cache = {}
+_id_cache_generation = 0
+
+def tag_ids_changed():
+    """Invalidate all cached ID lookups"""
+    global _id_cache_generation
+    _id_cache_generation += 1
+
+def lookup_id(idtype, name):
+    """Find an ID data block by name, using the ID lookup cache"""
+    if not name:
+        return None
+    key = (idtype, name)
+    entry = _id_cache.get(key, None)
+    if entry is not None and entry[0] == _id_cache_generation:
+        value = entry[1]
+        # cheap check for renamed or removed IDs in between generation updates
+        try:
+            if value.name == name:
+                return value
+        except ReferenceError:
+            pass
+
+    value = getattr(bpy.data, _idtype_list_props[idtype], {}).get(name, None)
+    if value is not None:
+        _id_cache[key] = (_id_cache_generation, value)
+    else:
+        _id_cache.pop(key, None)
+    return value
+
+# Names of IDRefs that failed to resolve during property reads.
+# They are reset in a batch by clear_stale_names instead of writing during reads.
+# The struct may be freed in between, entries are (ID, path from the ID, name attr, idtype, name)
+# and resolved through the ID, which is invalidated when it is removed.
+_stale_names = {}
+
+def _tag_stale_name(data, name_attr, idtype, name):
+    _stale_names[(data.as_pointer(), name_attr)] = (data.id_data, data.path_from_id(), name_attr, idtype, name)
+
+def clear_stale_names():
+    """Reset stored names of IDRefs that point to nonexisting IDs"""
+    pending = list(_stale_names.values())
+    _stale_names.clear()
+    for id_data, path, name_attr, idtype, name in pending:
+        try:
+            data = id_data.path_resolve(path) if path else id_data
+            # XXX this is not 100% reliable, but better than keeping invalid names around
+            if data.get(name_attr, "") == name and lookup_id(idtype, name) is None:
+                data[name_attr] = ""
+        except (ReferenceError, ValueError):
+            pass
+
 def bpy_register_idref(cls, attr, idrefprop):
     idlist = get_idtype_list(idrefprop.idtype)
     name_attr = "%s__name__" % attr
@@ -77,11 +135,18 @@ def bpy_register_idref(cls, attr, idrefprop):
 
     setattr(cls, idtype_attr, idrefprop.idtype)
 
+    # attr -> idtype of all IDRef properties of the class, including inherited ones
+    idref_idtypes = cls.__dict__.get("_idref_idtypes", None)
+    if idref_idtypes is None:
+        idref_idtypes = dict(getattr(cls, "_idref_idtypes", {}))
+        setattr(cls, "_idref_idtypes", idref_idtypes)
+    idref_idtypes[attr] = idrefprop.idtype
+
     def prop_get_name(self):
         return self.get(name_attr, "")
 
     def prop_set_name(self, value):
-        idvalue = idlist().get(value, None)
+        idvalue = lookup_id(idrefprop.idtype, value)
         if idvalue is not None:
             if idrefprop.poll and not idrefprop.poll(self, idvalue):
                 return
@@ -101,11 +166,10 @@ def bpy_register_idref(cls, attr, idrefprop):
 
     def prop_get(self):
         name = self.get(name_attr, "")
-        value = idlist().get(name, None)
-        # Reset the name idproperty if invalid
-        # XXX this is not 100% reliable, but better than keeping invalid names around
-        if value is None:
-            self[name_attr] = ""
+        value = lookup_id(idrefprop.idtype, name)
+        # Reset the name idproperty if invalid, deferred to avoid writing during reads
+        if value is None and name:
+            _tag_stale_name(self, name_attr, idrefprop.idtype, name)
         return value
 
     def prop_set(self, value):
@@ -121,6 +185,9 @@ def bpy_register_idref(cls, attr, idrefprop):
             if 'FAKE_USER' in idrefprop.options:
                 value.use_fake_user = True
             self[name_attr] = value.name
+        # ID properties are written directly, RNA doesn't call the update
+        if idrefprop.update:
+            idrefprop.update(self, bpy.context)
 
     def prop_del(self):
         delattr(self, name_attr)
@@ -132,6 +199,39 @@ def bpy_register_idref(cls, attr, idrefprop):
 
 def bpy_unregister_idref(cls, attr):
     delattr(cls, attr)
+    cls.__dict__.get("_idref_idtypes", {}).pop(attr, None)
+
+
+def resolve_idrefs(structs):
+    """Resolve all IDRef properties of the given structs at once.
+
+    Lookups are grouped by idtype, so each bpy.data collection is fetched once.
+    Returns a dict mapping (struct, attr) to the referenced ID or None.
+    """
+    by_idtype = {}
+    for data in structs:
+        for attr, idtype in getattr(data, "_idref_idtypes", {}).items():
+            name_attr = "%s__name__" % attr
+            by_idtype.setdefault(idtype, []).append((data, attr, name_attr, data.get(name_attr, "")))
+
+    result = {}
+    for idtype, refs in by_idtype.items():
+        collection = getattr(bpy.data, _idtype_list_props[idtype], {})
+        found = {}
+        for data, attr, name_attr, name in refs:
+            if not name:
+                result[(data, attr)] = None
+                continue
+            if name not in found:
+                value = collection.get(name, None)
+                if value is not None:
+                    _id_cache[(idtype, name)] = (_id_cache_generation, value)
+                found[name] = value
+            value = found[name]
+            if value is None:
+                _tag_stale_name(data, name_attr, idtype, name)
+            result[(data, attr)] = value
+    return result
 
 
 def MetaIDRefContainer(base=type):
@@ -163,6 +263,42 @@ class IDRefProperty():
         self.update = update
         self.poll = poll
 
+@persistent
+def idref_update_handler(*args):
+    # IDs may have been added, removed or renamed
+    tag_ids_changed()
+    clear_stale_names()
+
+@persistent
+def idref_load_handler(*args):
+    # all data has been freed or reallocated, queued names can't be resolved anymore
+    tag_ids_changed()
+    _stale_names.clear()
+
+def _idref_handler_lists():
+    handlers = bpy.app.handlers
+    # depsgraph_update_post replaces scene_update_post in newer Blender versions
+    update = getattr(handlers, "depsgraph_update_post", None)
+    if update is None:
+        update = handlers.scene_update_post
+    return [(handlers.load_post, idref_load_handler),
+            (handlers.undo_post, idref_load_handler),
+            (handlers.redo_post, idref_load_handler),
+            (update, idref_update_handler)]
+
+def register():
+    for handler_list, handler in _idref_handler_lists():
+        if handler not in handler_list:
+            handler_list.append(handler)
+
+def unregister():
+    for handler_list, handler in _idref_handler_lists():
+        if handler in handler_list:
+            handler_list.remove(handler)
+    tag_ids_changed()
+    _stale_names.clear()
+
+
 # XXX could be injected into UILayout as a template
 def draw_idref(layout, data, prop, text=""):
     row = layout.row(align=True)
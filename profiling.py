@@ -0,0 +1,201 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""Opt-in per-node profiling.
+
+While a Profiler is enabled, node init, _verify_sockets, execute and socket
+draw/draw_color methods are replaced by timing wrappers. Disabling restores
+the original functions, so there is no overhead at all when profiling is off.
+
+    with Profiler() as prof:
+        tree.evaluate()
+    print(prof.report())
+    prof.export_chrome_trace("/tmp/trace.json")
+
+The trace file can be loaded in chrome://tracing or ui.perfetto.dev.
+"""
+
+import json
+import os
+import threading
+import tracemalloc
+from time import perf_counter
+from pynodes_framework.base import Node, NodeSocket
+from pynodes_framework import execution
+
+
+# (base class, method name, function returning the node from (self, args))
+_hooks = [
+    (Node, "init", lambda self, args: self),
+    (Node, "_verify_sockets", lambda self, args: self),
+    (Node, "execute", lambda self, args: self),
+    (NodeSocket, "draw", lambda self, args: args[2]),
+    (NodeSocket, "draw_color", lambda self, args: args[1]),
+    ]
+
+
+def _subclasses(cls):
+    result = [cls]
+    for subcls in cls.__subclasses__():
+        result.extend(_subclasses(subcls))
+    return result
+
+
+class ProfileStats():
+    """Accumulated call statistics"""
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.allocated = 0
+
+    def as_dict(self):
+        return {"count" : self.count, "time" : self.time, "allocated" : self.allocated}
+
+
+class Profiler():
+    """Records call counts, wall time and allocations per node and node type"""
+
+    def __init__(self, track_allocations=False, record_events=True, max_events=1000000):
+        self.track_allocations = track_allocations
+        self.record_events = record_events
+        self.max_events = max_events
+        self.enabled = False
+        # (method, node type) -> ProfileStats
+        self.type_stats = {}
+        # (method, node type, node name) -> ProfileStats
+        self.node_stats = {}
+        # (method, node type, node name, thread id, start, duration)
+        self.events = []
+        self._patched = []
+        self._start_time = perf_counter()
+        self._started_tracemalloc = False
+
+    def _record(self, method, node, start, duration, allocated):
+        node_type = getattr(node, "bl_idname", type(node).__name__)
+        node_name = getattr(node, "name", "")
+
+        for stats_map, key in ((self.type_stats, (method, node_type)), (self.node_stats, (method, node_type, node_name))):
+            stats = stats_map.get(key, None)
+            if stats is None:
+                stats = stats_map[key] = ProfileStats()
+            stats.count += 1
+            stats.time += duration
+            stats.allocated += allocated
+
+        if self.record_events and len(self.events) < self.max_events:
+            self.events.append((method, node_type, node_name, threading.get_ident(), start, duration))
+
+    def _wrap(self, method, func, get_node):
+        profiler = self
+        track_allocations = self.track_allocations
+
+        def wrapper(self, *args, **kw):
+            if track_allocations:
+                mem = tracemalloc.get_traced_memory()[0]
+            start = perf_counter()
+            try:
+                return func(self, *args, **kw)
+            finally:
+                duration = perf_counter() - start
+                allocated = tracemalloc.get_traced_memory()[0] - mem if track_allocations else 0
+                profiler._record(method, get_node(self, args), start, duration, allocated)
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        wrapper.profiled_function = func
+        return wrapper
+
+    def _rebind_plans(self):
+        # compiled plans hold bound execute methods, bind them again to pick up the change
+        for revision, plan in execution._tree_plans.values():
+            for step in plan.steps:
+                step.execute = step.node.execute
+
+    def enable(self):
+        if self.enabled:
+            return
+        if self.track_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+        for base_cls, method, get_node in _hooks:
+            for cls in _subclasses(base_cls):
+                func = cls.__dict__.get(method, None)
+                if func is None or hasattr(func, "profiled_function"):
+                    continue
+                setattr(cls, method, self._wrap(method, func, get_node))
+                self._patched.append((cls, method, func))
+
+        self._rebind_plans()
+        self.enabled = True
+
+    def disable(self):
+        if not self.enabled:
+            return
+        for cls, method, func in reversed(self._patched):
+            setattr(cls, method, func)
+        self._patched.clear()
+
+        self._rebind_plans()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        self.enabled = False
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.disable()
+
+    def clear(self):
+        self.type_stats.clear()
+        self.node_stats.clear()
+        self.events.clear()
+
+    def report(self, limit=20):
+        """Text summary of the most expensive node types"""
+        lines = ["%-40s %-16s %10s %12s %12s" % ("node type", "method", "calls", "time (ms)", "alloc (kB)")]
+        ranked = sorted(self.type_stats.items(), key=lambda item: item[1].time, reverse=True)
+        for (method, node_type), stats in ranked[:limit]:
+            lines.append("%-40s %-16s %10d %12.3f %12.1f" % (node_type, method, stats.count, stats.time * 1000.0, stats.allocated / 1024.0))
+        return "\n".join(lines)
+
+    def chrome_trace(self):
+        """Recorded events in the Chrome/Perfetto trace event format"""
+        pid = os.getpid()
+        events = []
+        for method, node_type, node_name, thread, start, duration in self.events:
+            events.append({
+                "name" : "%s.%s" % (node_type, method),
+                "cat" : method,
+                "ph" : "X",
+                "ts" : (start - self._start_time) * 1e6,
+                "dur" : duration * 1e6,
+                "pid" : pid,
+                "tid" : thread,
+                "args" : {"node" : node_name, "type" : node_type},
+                })
+        return {"traceEvents" : events, "displayTimeUnit" : "ms"}
+
+    def export_chrome_trace(self, filepath):
+        with open(filepath, "w") as f:
+            json.dump(self.chrome_trace(), f)
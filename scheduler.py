@@ -0,0 +1,150 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""Parallel evaluation of independent branches of an execution plan.
+
+Nodes declare where they can be executed with the execute_policy class attribute:
+
+'MAIN'      Default. Executed on the calling (main) thread, may access RNA data.
+'THREAD'    Thread safe, execute only uses its inputs and can run on a worker thread.
+'PROCESS'   Pure python function execute_process(inputs) on the node class, run in a
+            worker process if the scheduler has a process pool. It must be picklable,
+            i.e. defined in a module that can be imported without bpy. Inputs are
+            passed as plain values, array properties as tuples when sent to a process.
+
+Unlinked input values are always read on the main thread before a node is dispatched.
+"""
+
+import os
+import sys
+import multiprocessing
+import bpy
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from pynodes_framework.execution import ExecutionContext, wrap_lazy_inputs
+from pynodes_framework.cache import hashable_value
+
+
+def _process_context():
+    # Forking would copy the whole Blender process including its threads.
+    # Spawned workers must run the bundled python, in Blender sys.executable is
+    # the Blender binary before 2.92 (binary_path_python was removed after).
+    context = multiprocessing.get_context("spawn")
+    executable = getattr(bpy.app, "binary_path_python", None) or sys.executable
+    if executable:
+        context.set_executable(executable)
+    return context
+
+
+def _picklable_value(value):
+    # RNA arrays can't be pickled, other values are sent unchanged
+    if type(value).__name__ == "bpy_prop_array":
+        return hashable_value(value)
+    return value
+
+
+class ParallelScheduler():
+    """Runs ready nodes of an execution plan concurrently on worker pools"""
+
+    def __init__(self, max_workers=None, max_processes=0):
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        self.thread_pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.process_pool = ProcessPoolExecutor(max_workers=max_processes, mp_context=_process_context()) if max_processes else None
+
+    def shutdown(self):
+        self.thread_pool.shutdown()
+        if self.process_pool:
+            self.process_pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def _submit(self, step, policy, context, inputs):
+        if policy == 'PROCESS':
+            # lazy inputs are never wrapped here, functions can't be sent to worker processes
+            if self.process_pool:
+                inputs = { identifier : _picklable_value(value) for identifier, value in inputs.items() }
+                return self.process_pool.submit(type(step.node).execute_process, inputs)
+            return self.thread_pool.submit(type(step.node).execute_process, inputs)
+        if step.lazy_inputs:
+            wrap_lazy_inputs(step, inputs)
+        return self.thread_pool.submit(step.execute, context, inputs)
+
+    def run(self, plan, context=None):
+        """Evaluate all dirty nodes of the plan, returns the slot value list"""
+        if context is None:
+            context = ExecutionContext(plan.tree, plan)
+        steps = plan.steps
+        values = plan.values
+        dirty = plan.dirty
+        plan.resolve_idrefs(context)
+
+        # number of unfinished upstream steps for each dirty step
+        waiting = {}
+        for i, step in enumerate(steps):
+            if dirty[i]:
+                upstream = { plan.step_index[source[0]] for source in step.sources if source is not None }
+                waiting[i] = sum(1 for j in upstream if dirty[j])
+        ready = [i for i, count in waiting.items() if count == 0]
+        main_ready = []
+        futures = {}
+
+        def release(i):
+            for j in plan.downstream[i]:
+                # clean consumers of dirty steps are left by pulls with lazy inputs
+                if j not in waiting:
+                    continue
+                waiting[j] -= 1
+                if waiting[j] == 0:
+                    ready.append(j)
+
+        try:
+            while ready or main_ready or futures:
+                # dispatch everything that became ready, inputs are read on the main thread
+                while ready:
+                    i = ready.pop()
+                    step = steps[i]
+                    policy = getattr(step.node, "execute_policy", 'MAIN')
+                    if policy == 'MAIN':
+                        main_ready.append(i)
+                    else:
+                        future = self._submit(step, policy, context, plan.step_inputs(i, values))
+                        futures[future] = i
+
+                if main_ready:
+                    i = main_ready.pop(0)
+                    plan._execute_step(i, context)
+                    release(i)
+                    continue
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = futures.pop(future)
+                    plan.store_outputs(i, future.result(), values)
+                    plan.finish_step(i)
+                    release(i)
+        finally:
+            for future in futures:
+                future.cancel()
+
+        return values
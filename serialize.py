@@ -0,0 +1,210 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""Compact serialization of node trees.
+
+    data = dump_tree(tree)
+    copy = load_tree(data, name="Copy")
+
+The format is a small binary header (magic, format version) followed by
+zlib compressed JSON. Each node type is stored once with its layout signature
+and the identifiers of its parameter values, nodes only store their value lists.
+Links refer to sockets by identifier, IDRef properties are stored by ID name.
+
+When the stored layout signature matches the registered node class, nodes are
+created without calling their init function and get their sockets in order.
+Otherwise the regular init is used and values are matched up by identifier.
+"""
+
+import bpy
+import json
+import struct
+import zlib
+from mathutils import Matrix
+from pynodes_framework import base
+from pynodes_framework.execution import tag_tree_changed
+
+
+MAGIC = b"PYND"
+FORMAT_VERSION = 1
+_header = struct.Struct("<4sH")
+
+
+class SerializationError(Exception):
+    pass
+
+
+def _plain_value(value):
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, set):
+        # enum flags
+        return sorted(value)
+    if isinstance(value, Matrix):
+        # same column-major order as the flat property storage
+        return [x for col in value.col for x in col]
+    return list(value[:])
+
+def _type_fields(cls):
+    # (identifier, is_output) of all parameters with a property
+    return [(param.identifier, param.is_output) for param in cls._node_type_parameters.values() if param.prop]
+
+def _idref_names(node):
+    names = {}
+    for attr in getattr(node, "_idref_idtypes", {}):
+        name = node.get("%s__name__" % attr, "")
+        if name:
+            names[attr] = name
+    return names
+
+
+def dump_tree(tree):
+    """Serialize the nodes, values and links of a tree to bytes"""
+    types = [] # (bl_idname, layout signature, value identifiers)
+    type_index = {}
+    nodes = []
+    node_index = {}
+
+    for node in tree.nodes:
+        cls = type(node)
+        index = type_index.get(cls, None)
+        if index is None:
+            if hasattr(cls, "_node_type_parameters"):
+                fields = _type_fields(cls)
+                signature = cls._node_layout_signature
+            else:
+                fields = []
+                signature = None
+            index = type_index[cls] = len(types)
+            types.append((node.bl_idname, signature, [identifier for identifier, is_output in fields]))
+
+        data = node.socket_data() if hasattr(node, "socket_data") else node
+        values = [_plain_value(getattr(data, identifier)) for identifier in types[index][2]]
+        node_index[node.name] = len(nodes)
+        nodes.append((index, node.name, list(node.location[:]), values, _idref_names(node)))
+
+    links = [(node_index[link.from_node.name], link.from_socket.identifier,
+              node_index[link.to_node.name], link.to_socket.identifier)
+             for link in tree.links]
+
+    payload = {
+        "name" : tree.name,
+        "bl_idname" : tree.bl_idname,
+        "types" : types,
+        "nodes" : nodes,
+        "links" : links,
+        }
+    return _header.pack(MAGIC, FORMAT_VERSION) + zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+
+
+def _read_payload(data):
+    if len(data) < _header.size:
+        raise SerializationError("Data too short for a node tree")
+    magic, version = _header.unpack_from(data)
+    if magic != MAGIC:
+        raise SerializationError("Not a node tree, unknown magic %r" % magic)
+    if version > FORMAT_VERSION:
+        raise SerializationError("Node tree format version %d is newer than supported version %d" % (version, FORMAT_VERSION))
+    try:
+        payload = json.loads(zlib.decompress(data[_header.size:]).decode("utf-8"))
+    except (zlib.error, ValueError) as exc:
+        raise SerializationError("Corrupt node tree data: %s" % exc) from exc
+    if not isinstance(payload, dict) or any(key not in payload for key in ("name", "bl_idname", "types", "nodes", "links")):
+        raise SerializationError("Corrupt node tree data: missing fields")
+    return payload
+
+def _set_value(data, identifier, value):
+    if isinstance(value, list) and isinstance(getattr(data, identifier), set):
+        value = set(value)
+    setattr(data, identifier, value)
+
+
+def load_tree(data, name=None):
+    """Create a new node tree from serialized data, returns the tree"""
+    payload = _read_payload(data)
+
+    # node types: (bl_idname, value identifiers, stored layout matches the class),
+    # checked before creating the tree so errors don't leave an empty tree behind
+    types = []
+    for bl_idname, signature, identifiers in payload["types"]:
+        cls = getattr(bpy.types, bl_idname, None)
+        if cls is None:
+            raise SerializationError("Node type %r is not registered" % bl_idname)
+        matches = signature is not None and getattr(cls, "_node_layout_signature", None) == signature
+        types.append((bl_idname, identifiers, matches))
+
+    tree = bpy.data.node_groups.new(name or payload["name"], payload["bl_idname"])
+
+    nodes = []
+    for index, node_name, location, values, idref_names in payload["nodes"]:
+        bl_idname, identifiers, matches = types[index]
+        if matches:
+            with base.restoring_nodes():
+                node = tree.nodes.new(bl_idname)
+        else:
+            node = tree.nodes.new(bl_idname)
+        node.name = node_name
+        node.location = location
+
+        data = node.socket_data() if hasattr(node, "socket_data") else node
+        if matches:
+            for identifier, value in zip(identifiers, values):
+                _set_value(data, identifier, value)
+        else:
+            # layout changed since saving, skip values of removed parameters
+            # and of parameters whose type changed
+            for identifier, value in zip(identifiers, values):
+                if hasattr(data, identifier):
+                    try:
+                        _set_value(data, identifier, value)
+                    except (TypeError, ValueError):
+                        pass
+
+        for attr, id_name in idref_names.items():
+            node["%s__name__" % attr] = id_name
+        nodes.append(node)
+
+    # identifier -> socket maps of each node, built when a link needs them
+    output_index = {}
+    input_index = {}
+    for from_index, from_identifier, to_index, to_identifier in payload["links"]:
+        from_socket = _socket_index(output_index, nodes, from_index, True).get(from_identifier, None)
+        to_socket = _socket_index(input_index, nodes, to_index, False).get(to_identifier, None)
+        if from_socket and to_socket:
+            tree.links.new(from_socket, to_socket)
+
+    tag_tree_changed(tree)
+    return tree
+
+def _socket_index(indices, nodes, index, output):
+    sockets = indices.get(index, None)
+    if sockets is None:
+        node = nodes[index]
+        sockets = indices[index] = { socket.identifier : socket for socket in (node.outputs if output else node.inputs) }
+    return sockets
+
+
+def write_tree(tree, filepath):
+    with open(filepath, "wb") as f:
+        f.write(dump_tree(tree))
+
+def read_tree(filepath, name=None):
+    with open(filepath, "rb") as f:
+        return load_tree(f.read(), name)
@@ -38,6 +38,14 @@ class AddNode(bpy.types.Node, node_base.Node):
     input_b = NodeParamFloat(label="Value")
     result = NodeParamFloat(label="Result", is_output=True)
 
+    def execute(self, context, inputs):
+        return {"result" : inputs["input_a"] + inputs["input_b"]}
+
+    expressions = {"result" : "{input_a} + {input_b}"}
+
+    # numpy arrays support the same operators, so execute doubles as batch kernel
+    execute_batch = execute
+
 @math_node_category("Arithmetic")
 class SubtractNode(bpy.types.Node, node_base.Node):
     bl_idname = "MathNodeSubtract"
@@ -47,6 +55,14 @@ class SubtractNode(bpy.types.Node, node_base.Node):
     input_b = NodeParamFloat(label="Value")
     result = NodeParamFloat(label="Result", is_output=True)
 
+    def execute(self, context, inputs):
+        return {"result" : inputs["input_a"] - inputs["input_b"]}
+
+    expressions = {"result" : "{input_a} - {input_b}"}
+
+    # numpy arrays support the same operators, so execute doubles as batch kernel
+    execute_batch = execute
+
 
 def register():
     bpy.utils.register_module(__name__)
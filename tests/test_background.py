@@ -0,0 +1,199 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""Headless tests of background evaluation, using the fake_bpy stand-in.
+
+    python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+import fake_bpy
+
+bpy = fake_bpy.install()
+fake_bpy.load_framework()
+
+from pynodes_framework import base, background
+from pynodes_framework.parameter import NodeParamFloat
+
+
+class BackgroundTestTree(bpy.types.NodeTree, base.NodeTree):
+    bl_idname = "BackgroundTestTree"
+
+
+# released by tests to let thread nodes finish
+release = threading.Event()
+
+class BackgroundThreadNode(bpy.types.Node, base.Node):
+    bl_idname = "BackgroundThreadNode"
+    socket_type = base.PyNodesSocket
+    execute_policy = 'THREAD'
+
+    input_a = NodeParamFloat("A")
+    input_b = NodeParamFloat("B")
+    result = NodeParamFloat("Result", is_output=True)
+
+    def execute(self, context, inputs):
+        release.wait(5.0)
+        return {"result" : inputs["input_a"] + inputs["input_b"]}
+
+
+class BackgroundMainNode(bpy.types.Node, base.Node):
+    bl_idname = "BackgroundMainNode"
+    socket_type = base.PyNodesSocket
+
+    value = NodeParamFloat("Value")
+    result = NodeParamFloat("Result", is_output=True)
+
+    def execute(self, context, inputs):
+        if threading.current_thread() is not threading.main_thread():
+            raise RuntimeError("MAIN node executed on a worker thread")
+        return {"result" : inputs["value"] * 2.0}
+
+
+def setUpModule():
+    for cls in (BackgroundTestTree, BackgroundThreadNode, BackgroundMainNode):
+        bpy.utils.register_class(cls)
+    base.register()
+
+def tearDownModule():
+    base.unregister()
+
+
+def worker_threads():
+    return [thread for thread in threading.enumerate() if thread.name == "pynodes evaluation"]
+
+
+class BackgroundEvaluatorTest(unittest.TestCase):
+    def setUp(self):
+        release.set()
+        self.tree = bpy.data.node_groups.new("Background", "BackgroundTestTree")
+        # chain of thread nodes, each adding 1, ending in a main thread node
+        self.nodes = []
+        prev = None
+        for i in range(5):
+            node = self.tree.nodes.new("BackgroundThreadNode")
+            node.input_b = 1.0
+            if prev:
+                self.tree.links.new(prev.outputs[0], node.inputs[0])
+            self.nodes.append(node)
+            prev = node
+        self.output = self.tree.nodes.new("BackgroundMainNode")
+        self.tree.links.new(prev.outputs[0], self.output.inputs[0])
+
+        self.loop = background.HeadlessLoop()
+        self.progress = []
+        self.finished = []
+        self.evaluator = background.BackgroundEvaluator(self.tree, loop=self.loop,
+            on_progress=lambda evaluator, done, total, name: self.progress.append((done, total)),
+            on_finished=self.finished.append)
+
+    def tearDown(self):
+        release.set()
+        self.evaluator.cancel()
+        self.assertTrue(self.loop.run(timeout=5.0))
+        bpy.data.node_groups.remove(self.tree)
+
+    def result(self):
+        return self.tree.execution_plan().output_value(self.output.name, "result")
+
+    def test_finish_and_progress(self):
+        self.evaluator.start()
+        self.assertEqual(self.evaluator.state, 'RUNNING')
+        self.assertTrue(self.loop.run(timeout=5.0))
+
+        self.assertEqual(self.evaluator.state, 'FINISHED')
+        self.assertEqual(self.finished, [self.evaluator])
+        self.assertEqual(self.progress, [(i, 6) for i in range(1, 7)])
+        self.assertEqual(self.result(), 10.0)
+        self.assertFalse(any(self.tree.execution_plan().dirty))
+
+    def test_cancel(self):
+        release.clear()
+        self.evaluator.start()
+        self.evaluator.cancel()
+        self.assertEqual(self.evaluator.state, 'CANCELLED')
+        release.set()
+        self.assertTrue(self.loop.run(timeout=5.0))
+
+        self.assertEqual(self.evaluator.state, 'CANCELLED')
+        self.assertEqual(self.finished, [])
+        self.assertTrue(all(self.tree.execution_plan().dirty))
+
+    def test_cancel_releases_main_thread_call(self):
+        # the worker queues its main thread call only after the run was cancelled
+        reached = threading.Event()
+        cancelled = threading.Event()
+        call = self.evaluator.queue.call
+        def delayed_call(function, *args):
+            reached.set()
+            cancelled.wait(5.0)
+            return call(function, *args)
+        self.evaluator.queue.call = delayed_call
+
+        self.evaluator.start()
+        self.assertTrue(reached.wait(5.0))
+        self.evaluator.cancel()
+        cancelled.set()
+        self.assertTrue(self.loop.run(timeout=5.0))
+
+        self.assertEqual(worker_threads(), [])
+        self.assertEqual(self.evaluator.state, 'CANCELLED')
+
+    def test_restart_on_value_change(self):
+        release.clear()
+        self.evaluator.start()
+        self.nodes[0].input_b = 11.0
+        release.set()
+        self.assertTrue(self.loop.run(timeout=5.0))
+
+        self.assertEqual(self.evaluator.state, 'FINISHED')
+        self.assertGreaterEqual(self.evaluator.restarts, 1)
+        self.assertEqual(self.result(), 30.0)
+
+    def test_restart_on_link_change(self):
+        release.clear()
+        self.evaluator.start()
+        self.tree.links.remove(self.tree.links[0])
+        release.set()
+        self.assertTrue(self.loop.run(timeout=5.0))
+
+        self.assertEqual(self.evaluator.state, 'FINISHED')
+        self.assertGreaterEqual(self.evaluator.restarts, 1)
+        self.assertEqual(self.result(), 8.0)
+
+    def test_no_restart(self):
+        self.evaluator.restart = False
+        release.clear()
+        self.evaluator.start()
+        self.nodes[0].input_b = 11.0
+        release.set()
+        self.assertTrue(self.loop.run(timeout=5.0))
+
+        self.assertEqual(self.evaluator.state, 'CANCELLED')
+        self.assertEqual(self.evaluator.restarts, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""Headless tests of socket verification, using the fake_bpy stand-in.
+
+    python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import itertools
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+import fake_bpy
+
+bpy = fake_bpy.install()
+fake_bpy.load_framework()
+
+from pynodes_framework import base
+from pynodes_framework.parameter import NodeParamFloat
+
+
+class BaseTestTree(bpy.types.NodeTree, base.NodeTree):
+    bl_idname = "BaseTestTree"
+
+
+class BaseReorderNode(bpy.types.Node, base.Node):
+    bl_idname = "BaseReorderNode"
+    socket_type = base.PyNodesSocket
+
+    a = NodeParamFloat("A")
+    b = NodeParamFloat("B")
+    c = NodeParamFloat("C")
+    d = NodeParamFloat("D")
+
+
+def setUpModule():
+    for cls in (BaseTestTree, BaseReorderNode):
+        bpy.utils.register_class(cls)
+    base.register()
+
+def tearDownModule():
+    base.unregister()
+
+
+class Socket():
+    def __init__(self, identifier):
+        self.identifier = identifier
+
+
+class SocketList(list):
+    """Socket collection recording its moves"""
+
+    def __init__(self, identifiers):
+        super().__init__(Socket(identifier) for identifier in identifiers)
+        self.moves = 0
+
+    def move(self, from_index, to_index):
+        self.moves += 1
+        self.insert(to_index, self.pop(from_index))
+
+    def identifiers(self):
+        return [socket.identifier for socket in self]
+
+
+def lis_length(seq):
+    # quadratic reference
+    lengths = []
+    for i, value in enumerate(seq):
+        lengths.append(1 + max([lengths[j] for j in range(i) if seq[j] < value], default=0))
+    return max(lengths, default=0)
+
+
+class LongestIncreasingSubsequenceTest(unittest.TestCase):
+    def check(self, seq):
+        indices = base._longest_increasing_subsequence(seq)
+        self.assertEqual(indices, sorted(indices))
+        values = [seq[i] for i in indices]
+        self.assertTrue(all(x < y for x, y in zip(values, values[1:])), seq)
+        self.assertEqual(len(indices), lis_length(seq), seq)
+
+    def test_empty(self):
+        self.assertEqual(base._longest_increasing_subsequence([]), [])
+
+    def test_sorted(self):
+        self.assertEqual(base._longest_increasing_subsequence([0, 1, 2, 3]), [0, 1, 2, 3])
+
+    def test_reversed(self):
+        self.assertEqual(len(base._longest_increasing_subsequence([3, 2, 1, 0])), 1)
+
+    def test_duplicates(self):
+        # strictly increasing
+        self.assertEqual(len(base._longest_increasing_subsequence([1, 1, 1])), 1)
+
+    def test_permutations(self):
+        for n in range(1, 7):
+            for seq in itertools.permutations(range(n)):
+                self.check(list(seq))
+
+
+class ReorderSocketsTest(unittest.TestCase):
+    def test_sorted(self):
+        sockets = SocketList("abcd")
+        base._reorder_sockets(sockets, list("abcd"))
+        self.assertEqual(sockets.moves, 0)
+
+    def test_moved_to_front(self):
+        sockets = SocketList("bcda")
+        base._reorder_sockets(sockets, list("abcd"))
+        self.assertEqual(sockets.identifiers(), list("abcd"))
+        self.assertEqual(sockets.moves, 1)
+
+    def test_permutations(self):
+        # each socket outside the kept subsequence moves exactly once
+        order = list("abcdef")
+        for n in range(1, len(order) + 1):
+            target = order[:n]
+            for current in itertools.permutations(target):
+                sockets = SocketList(current)
+                base._reorder_sockets(sockets, target)
+                self.assertEqual(sockets.identifiers(), target, current)
+                rank = { identifier : i for i, identifier in enumerate(target) }
+                self.assertEqual(sockets.moves, n - lis_length([rank[identifier] for identifier in current]), current)
+
+
+class VerifySocketsTest(unittest.TestCase):
+    def setUp(self):
+        self.tree = bpy.data.node_groups.new("Base", "BaseTestTree")
+
+    def tearDown(self):
+        bpy.data.node_groups.remove(self.tree)
+
+    def test_reordered_parameter(self):
+        node = self.tree.nodes.new("BaseReorderNode")
+        self.assertEqual([socket.identifier for socket in node.inputs], list("abcd"))
+        # a reassigned parameter moves to the end
+        BaseReorderNode.b = NodeParamFloat("B")
+        moves = fake_bpy.stats["socket_moves"]
+        self.assertEqual(self.tree.verify_all(), 1)
+        self.assertEqual([socket.identifier for socket in node.inputs], list("acdb"))
+        self.assertEqual(fake_bpy.stats["socket_moves"] - moves, 1)
+        # verified nodes are up to date
+        self.assertEqual(self.tree.verify_all(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
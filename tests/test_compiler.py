@@ -0,0 +1,209 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""Headless tests of tree compilation, using the fake_bpy stand-in.
+
+    python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+import fake_bpy
+
+bpy = fake_bpy.install()
+fake_bpy.load_framework()
+
+from pynodes_framework import base, execution
+from pynodes_framework.compiler import compile_tree
+from pynodes_framework.parameter import NodeParamFloat
+
+
+class CompilerTestTree(bpy.types.NodeTree, base.NodeTree):
+    bl_idname = "CompilerTestTree"
+
+
+class CompilerOptimizedTree(bpy.types.NodeTree, base.NodeTree):
+    bl_idname = "CompilerOptimizedTree"
+    optimize_execution = True
+
+
+class CompilerAddNode(bpy.types.Node, base.Node):
+    bl_idname = "CompilerAddNode"
+    socket_type = base.PyNodesSocket
+    expressions = {"result" : "{a} + {b}"}
+
+    a = NodeParamFloat("A")
+    b = NodeParamFloat("B")
+    result = NodeParamFloat("Result", is_output=True)
+
+    def execute(self, context, inputs):
+        return {"result" : inputs["a"] + inputs["b"]}
+
+
+class CompilerScaleNode(bpy.types.Node, base.Node):
+    bl_idname = "CompilerScaleNode"
+    socket_type = base.PyNodesSocket
+
+    value = NodeParamFloat("Value")
+    factor = NodeParamFloat("Factor", default=2.0)
+    result = NodeParamFloat("Result", is_output=True)
+
+    def execute(self, context, inputs):
+        return {"result" : inputs["value"] * inputs["factor"]}
+
+
+class CompilerSwitchNode(bpy.types.Node, base.Node):
+    bl_idname = "CompilerSwitchNode"
+    socket_type = base.PyNodesSocket
+    lazy_inputs = ("a", "b")
+    # not inlined, lazy inputs need a function
+    expressions = {"result" : "{a} if {switch} else {b}"}
+
+    switch = NodeParamFloat("Switch")
+    a = NodeParamFloat("A")
+    b = NodeParamFloat("B")
+    result = NodeParamFloat("Result", is_output=True)
+
+    def execute(self, context, inputs):
+        return {"result" : inputs["a"]() if inputs["switch"] else inputs["b"]()}
+
+
+class CompilerOutputNode(bpy.types.Node, base.Node):
+    bl_idname = "CompilerOutputNode"
+    socket_type = base.PyNodesSocket
+    is_output_node = True
+
+    value = NodeParamFloat("Value")
+    result = NodeParamFloat("Result", is_output=True)
+
+    def execute(self, context, inputs):
+        return {"result" : inputs["value"]}
+
+
+def setUpModule():
+    for cls in (CompilerTestTree, CompilerOptimizedTree, CompilerAddNode, CompilerScaleNode,
+                CompilerSwitchNode, CompilerOutputNode):
+        bpy.utils.register_class(cls)
+    base.register()
+
+def tearDownModule():
+    base.unregister()
+
+
+class CompilerTestCase(unittest.TestCase):
+    tree_type = "CompilerTestTree"
+
+    def setUp(self):
+        self.tree = bpy.data.node_groups.new("Compiler", self.tree_type)
+        # Add -> Scale -> Switch.a, Add2 -> Switch.b, Switch -> Output
+        self.add = self.new_node("Add", "CompilerAddNode", a=1.0, b=2.0)
+        self.scale = self.new_node("Scale", "CompilerScaleNode")
+        self.other = self.new_node("Add2", "CompilerAddNode", a=10.0, b=20.0)
+        self.switch = self.new_node("Switch", "CompilerSwitchNode", switch=1.0)
+        self.output = self.new_node("Output", "CompilerOutputNode")
+        self.link(self.add, self.scale, "Value")
+        self.link(self.scale, self.switch, "A")
+        self.link(self.other, self.switch, "B")
+        self.link(self.switch, self.output, "Value")
+
+    def tearDown(self):
+        execution.free_plan(self.tree)
+        bpy.data.node_groups.remove(self.tree)
+
+    def new_node(self, name, bl_idname, **values):
+        node = self.tree.nodes.new(bl_idname)
+        node.name = name
+        for attr, value in values.items():
+            setattr(node, attr, value)
+        return node
+
+    def link(self, from_node, to_node, name):
+        return self.tree.links.new(from_node.outputs[0], to_node.inputs[name])
+
+    def assertSameResults(self):
+        compiled = compile_tree(self.tree)
+        results = compiled.evaluate()
+        plan = self.tree.evaluate()
+        self.assertEqual(results, { key : plan.output_value(*key) for key in compiled.results })
+        return results
+
+
+class CompileTreeTest(CompilerTestCase):
+    def test_results(self):
+        results = self.assertSameResults()
+        self.assertEqual(results, { ("Output", "result") : 6.0 })
+
+    def test_inlined(self):
+        compiled = compile_tree(self.tree)
+        # the switch has lazy inputs, scale and output have no expressions
+        self.assertEqual(compiled.inlined, 2)
+        self.assertEqual(compiled.source.count("= execute_"), 3)
+
+    def test_lazy_inputs(self):
+        self.switch.switch = 0.0
+        results = self.assertSameResults()
+        self.assertEqual(results, { ("Output", "result") : 30.0 })
+
+    def test_arguments(self):
+        compiled = compile_tree(self.tree)
+        self.assertIn(("Add", "a"), compiled.arguments)
+        self.assertIn(("Scale", "factor"), compiled.arguments)
+        self.assertNotIn(("Scale", "value"), compiled.arguments)
+
+    def test_values_changed(self):
+        compiled = compile_tree(self.tree)
+        self.add.a = 4.0
+        self.scale.factor = 3.0
+        # the function reads the current socket values
+        self.assertIs(compile_tree(self.tree), compiled)
+        self.assertEqual(self.assertSameResults(), { ("Output", "result") : 18.0 })
+
+    def test_recompiled(self):
+        compiled = compile_tree(self.tree)
+        self.tree.links.remove(self.output.inputs["Value"].links[0])
+        self.link(self.other, self.output, "Value")
+        self.assertIsNot(compile_tree(self.tree), compiled)
+        self.assertEqual(self.assertSameResults()[("Output", "result")], 30.0)
+
+
+class FoldedCompileTreeTest(CompilerTestCase):
+    tree_type = "CompilerOptimizedTree"
+
+    def test_literals(self):
+        plan = self.tree.execution_plan()
+        self.assertEqual(plan.report["folded"], 4)
+        compiled = compile_tree(self.tree)
+        # folded inputs are not arguments anymore
+        self.assertEqual(compiled.arguments, ())
+        self.assertIn("literal_", compiled.source)
+        self.assertEqual(self.assertSameResults(), { ("Output", "result") : 6.0 })
+
+    def test_folded_input_changed(self):
+        compiled = compile_tree(self.tree)
+        self.add.a = 4.0
+        self.assertIsNot(compile_tree(self.tree), compiled)
+        self.assertEqual(self.assertSameResults(), { ("Output", "result") : 12.0 })
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,649 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""Headless tests of execution plans, using the fake_bpy stand-in.
+
+    python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+import fake_bpy
+
+bpy = fake_bpy.install()
+fake_bpy.load_framework()
+
+from pynodes_framework import base, execution
+from pynodes_framework.cache import OutputCache
+from pynodes_framework.parameter import NodeParamFloat
+
+
+class ExecutionTestTree(bpy.types.NodeTree, base.NodeTree):
+    bl_idname = "ExecutionTestTree"
+
+
+# node name -> number of execute calls
+executed = {}
+
+class ExecutionAddNode(bpy.types.Node, base.Node):
+    bl_idname = "ExecutionAddNode"
+    socket_type = base.PyNodesSocket
+
+    a = NodeParamFloat("A")
+    b = NodeParamFloat("B")
+    result = NodeParamFloat("Result", is_output=True)
+
+    def execute(self, context, inputs):
+        executed[self.name] = executed.get(self.name, 0) + 1
+        return {"result" : inputs["a"] + inputs["b"]}
+
+
+class ExecutionOptimizedTree(bpy.types.NodeTree, base.NodeTree):
+    bl_idname = "ExecutionOptimizedTree"
+    optimize_execution = True
+
+
+class ExecutionMathNode(bpy.types.Node, base.Node):
+    bl_idname = "ExecutionMathNode"
+    socket_type = base.PyNodesSocket
+
+    operation = bpy.props.EnumProperty(name="Operation", items=[('ADD', "Add", ""), ('MULTIPLY', "Multiply", "")])
+    a = NodeParamFloat("A")
+    b = NodeParamFloat("B")
+    result = NodeParamFloat("Result", is_output=True)
+
+    def execute(self, context, inputs):
+        if self.operation == 'MULTIPLY':
+            return {"result" : inputs["a"] * inputs["b"]}
+        return {"result" : inputs["a"] + inputs["b"]}
+
+
+class ExecutionOutputNode(bpy.types.Node, base.Node):
+    bl_idname = "ExecutionOutputNode"
+    socket_type = base.PyNodesSocket
+    is_output_node = True
+
+    value = NodeParamFloat("Value")
+    result = NodeParamFloat("Result", is_output=True)
+
+    def execute(self, context, inputs):
+        executed[self.name] = executed.get(self.name, 0) + 1
+        return {"result" : inputs["value"]}
+
+
+class ExecutionSwitchNode(bpy.types.Node, base.Node):
+    bl_idname = "ExecutionSwitchNode"
+    socket_type = base.PyNodesSocket
+    lazy_inputs = ("a", "b")
+
+    switch = NodeParamFloat("Switch")
+    a = NodeParamFloat("A")
+    b = NodeParamFloat("B")
+    result = NodeParamFloat("Result", is_output=True)
+
+    def execute(self, context, inputs):
+        executed[self.name] = executed.get(self.name, 0) + 1
+        return {"result" : inputs["a"]() if inputs["switch"] else inputs["b"]()}
+
+
+class ExecutionFrameNode(bpy.types.Node, base.Node):
+    bl_idname = "ExecutionFrameNode"
+    socket_type = base.PyNodesSocket
+    time_dependent = True
+
+    scale = NodeParamFloat("Scale")
+    result = NodeParamFloat("Result", is_output=True)
+
+    def execute(self, context, inputs):
+        executed[self.name] = executed.get(self.name, 0) + 1
+        return {"result" : (context.frame or 0) * inputs["scale"]}
+
+
+class ExecutionForeignNode(bpy.types.Node):
+    # not a framework node, can't be evaluated
+    bl_idname = "ExecutionForeignNode"
+
+    def init(self, context):
+        self.outputs.new("NodeSocket", "Value")
+
+
+def setUpModule():
+    for cls in (ExecutionTestTree, ExecutionOptimizedTree, ExecutionAddNode, ExecutionMathNode, ExecutionOutputNode,
+                ExecutionSwitchNode, ExecutionFrameNode, ExecutionForeignNode):
+        bpy.utils.register_class(cls)
+    base.register()
+
+def tearDownModule():
+    base.unregister()
+
+
+class ExecutionTestCase(unittest.TestCase):
+    def setUp(self):
+        executed.clear()
+        self.tree = bpy.data.node_groups.new("Execution", "ExecutionTestTree")
+
+    def tearDown(self):
+        execution.free_plan(self.tree)
+        bpy.data.node_groups.remove(self.tree)
+
+    def new_node(self, name, a=0.0, b=0.0, bl_idname="ExecutionAddNode"):
+        node = self.tree.nodes.new(bl_idname)
+        node.name = name
+        node.a = a
+        node.b = b
+        return node
+
+    def link(self, from_node, to_node, identifier="a"):
+        to_socket = next(socket for socket in to_node.inputs if socket.identifier == identifier)
+        return self.tree.links.new(from_node.outputs[0], to_socket)
+
+    def result(self, node):
+        return self.tree.evaluate().output_value(node.name, "result")
+
+
+class DependencyTest(ExecutionTestCase):
+    def test_sort_order(self):
+        c = self.new_node("C")
+        b = self.new_node("B")
+        a = self.new_node("A")
+        self.new_node("D")
+        self.new_node("E")
+        self.link(a, b)
+        self.link(b, c)
+        nodes, sources = execution.tree_dependencies(self.tree)
+        # ties keep the node order
+        self.assertEqual([node.name for node in execution.topological_sort(nodes, sources)], ["A", "D", "E", "B", "C"])
+
+        plan = self.tree.execution_plan()
+        index = plan.step_index
+        self.assertLess(index["A"], index["B"])
+        self.assertLess(index["B"], index["C"])
+
+    def test_cycle(self):
+        self.new_node("A")
+        self.new_node("B")
+        self.new_node("C")
+        nodes, _ = execution.tree_dependencies(self.tree)
+        sources = { ("A", "a") : ("B", "result"), ("B", "a") : ("A", "result") }
+        with self.assertRaises(execution.NodeTreeCycleError) as cm:
+            execution.topological_sort(nodes, sources)
+        self.assertIn("'A', 'B'", str(cm.exception))
+        self.assertNotIn("'C'", str(cm.exception))
+
+    def test_reroute(self):
+        a = self.new_node("A", 1.0, 2.0)
+        b = self.new_node("B", b=1.0)
+        first = self.tree.nodes.new("NodeReroute")
+        second = self.tree.nodes.new("NodeReroute")
+        self.tree.links.new(a.outputs[0], first.inputs[0])
+        self.tree.links.new(first.outputs[0], second.inputs[0])
+        self.tree.links.new(second.outputs[0], b.inputs[0])
+
+        nodes, sources = execution.tree_dependencies(self.tree)
+        self.assertEqual(sources, { ("B", "a") : ("A", "result") })
+        self.assertEqual(self.result(b), 4.0)
+
+    def test_dangling_reroute(self):
+        b = self.new_node("B", 5.0, 1.0)
+        reroute = self.tree.nodes.new("NodeReroute")
+        self.tree.links.new(reroute.outputs[0], b.inputs[0])
+        # the input keeps its own value
+        self.assertEqual(self.result(b), 6.0)
+
+    def test_reroute_cycle(self):
+        b = self.new_node("B")
+        first = self.tree.nodes.new("NodeReroute")
+        second = self.tree.nodes.new("NodeReroute")
+        # the update after the edits removes links creating cycles again
+        with self.tree.batch_update():
+            self.tree.links.new(first.outputs[0], second.inputs[0])
+            self.tree.links.new(second.outputs[0], first.inputs[0])
+            self.tree.links.new(second.outputs[0], b.inputs[0])
+            with self.assertRaises(execution.NodeTreeCycleError):
+                execution.tree_dependencies(self.tree)
+
+    def test_link_error(self):
+        foreign = self.tree.nodes.new("ExecutionForeignNode")
+        b = self.new_node("B")
+        self.tree.links.new(foreign.outputs[0], b.inputs[0])
+        with self.assertRaises(execution.NodeTreeLinkError) as cm:
+            self.tree.evaluate()
+        self.assertIn(repr(foreign.name), str(cm.exception))
+
+    def test_link_error_through_reroute(self):
+        foreign = self.tree.nodes.new("ExecutionForeignNode")
+        reroute = self.tree.nodes.new("NodeReroute")
+        b = self.new_node("B")
+        self.tree.links.new(foreign.outputs[0], reroute.inputs[0])
+        self.tree.links.new(reroute.outputs[0], b.inputs[0])
+        with self.assertRaises(execution.NodeTreeLinkError):
+            self.tree.evaluate()
+
+
+class PlanReuseTest(ExecutionTestCase):
+    def test_same_revision(self):
+        a = self.new_node("A", 1.0)
+        plan = self.tree.evaluate()
+        # value changes don't compile again
+        a.a = 2.0
+        self.assertIs(self.tree.evaluate(), plan)
+        self.assertEqual(plan.output_value("A", "result"), 2.0)
+
+    def test_new_revision(self):
+        a = self.new_node("A", 1.0)
+        b = self.new_node("B", b=1.0)
+        self.link(a, b)
+        plan = self.tree.evaluate()
+        executed.clear()
+
+        # unaffected nodes keep their values in the new plan
+        self.new_node("C", 3.0)
+        new_plan = self.tree.evaluate()
+        self.assertIsNot(new_plan, plan)
+        self.assertEqual(executed, { "C" : 1 })
+        self.assertEqual(new_plan.output_value("B", "result"), 2.0)
+
+    def test_relinked(self):
+        a = self.new_node("A", 1.0)
+        b = self.new_node("B", 10.0)
+        c = self.new_node("C")
+        self.link(a, c)
+        self.tree.evaluate()
+        executed.clear()
+
+        self.link(b, c)
+        self.assertEqual(self.result(c), 10.0)
+        self.assertEqual(executed, { "C" : 1 })
+
+    def test_dirty_in_previous_plan(self):
+        a = self.new_node("A", 1.0)
+        self.tree.evaluate()
+        a.a = 5.0
+        # compiled again before the dirty node ran, its old value isn't reused
+        self.new_node("B")
+        self.assertEqual(self.result(a), 5.0)
+
+
+class DirtyTest(ExecutionTestCase):
+    def setUp(self):
+        super().setUp()
+        # A -> B -> C and an unrelated D
+        self.a = self.new_node("A", 1.0)
+        self.b = self.new_node("B", b=1.0)
+        self.c = self.new_node("C", b=1.0)
+        self.d = self.new_node("D", 1.0)
+        self.link(self.a, self.b)
+        self.link(self.b, self.c)
+        self.plan = self.tree.evaluate()
+        executed.clear()
+
+    def test_downstream(self):
+        self.b.b = 2.0
+        self.assertEqual([step.name for i, step in enumerate(self.plan.steps) if self.plan.dirty[i]], ["B", "C"])
+        self.tree.evaluate()
+        self.assertEqual(executed, { "B" : 1, "C" : 1 })
+        self.assertEqual(self.result(self.c), 4.0)
+
+    def test_clean(self):
+        self.tree.evaluate()
+        self.assertEqual(executed, {})
+
+    def test_all_dirty(self):
+        self.plan.tag_all_dirty()
+        self.tree.evaluate()
+        self.assertEqual(executed, { "A" : 1, "B" : 1, "C" : 1, "D" : 1 })
+
+    def test_replaced_node(self):
+        # a new node with the same name and links is not the same node
+        self.tree.nodes.remove(self.a)
+        a = self.new_node("A", 5.0)
+        self.assertEqual(a.name, "A")
+        self.link(a, self.b)
+        self.assertEqual(self.result(self.c), 7.0)
+        self.assertEqual(executed, { "A" : 1, "B" : 1, "C" : 1 })
+
+
+class PullTest(ExecutionTestCase):
+    def setUp(self):
+        super().setUp()
+        # A and B feed the lazy inputs of a switch picking A
+        self.a = self.new_node("A", 1.0)
+        self.b = self.new_node("B", 2.0)
+        self.switch = self.tree.nodes.new("ExecutionSwitchNode")
+        self.switch.name = "Switch"
+        self.switch.switch = 1.0
+        self.link(self.a, self.switch, "a")
+        self.link(self.b, self.switch, "b")
+        self.plan = self.tree.execution_plan()
+
+    def pull(self):
+        return self.tree.evaluate_output(self.switch.outputs[0])
+
+    def is_dirty(self, name):
+        return self.plan.dirty[self.plan.step_index[name]]
+
+    def test_picked_branch(self):
+        self.assertEqual(self.pull(), 1.0)
+        self.assertEqual(executed, { "A" : 1, "Switch" : 1 })
+        self.assertTrue(self.is_dirty("B"))
+        self.assertFalse(self.is_dirty("Switch"))
+
+    def test_clean(self):
+        self.pull()
+        executed.clear()
+        self.assertEqual(self.pull(), 1.0)
+        self.assertEqual(executed, {})
+
+    def test_unlinked_lazy_input(self):
+        self.tree.links.remove(self.switch.inputs["B"].links[0])
+        self.switch.b = 7.0
+        self.switch.switch = 0.0
+        self.assertEqual(self.tree.evaluate_output(self.switch.outputs[0]), 7.0)
+
+    def test_switched(self):
+        self.pull()
+        self.switch.switch = 0.0
+        self.assertEqual(self.pull(), 2.0)
+        self.assertEqual(executed, { "A" : 1, "B" : 1, "Switch" : 2 })
+
+    def test_dirty_step_with_clean_consumer(self):
+        self.pull()
+        executed.clear()
+        # B is dirty already, the switch stays clean and never used its value
+        self.b.a = 3.0
+        self.assertFalse(self.is_dirty("Switch"))
+        self.assertEqual(self.pull(), 1.0)
+        self.assertEqual(executed, {})
+
+        # a full run executes the dirty branch but not the clean consumer
+        self.tree.evaluate()
+        self.assertEqual(executed, { "B" : 1 })
+        self.assertFalse(any(self.plan.dirty))
+
+        self.switch.switch = 0.0
+        self.assertEqual(self.pull(), 3.0)
+
+    def test_upstream_of_picked_branch(self):
+        self.pull()
+        executed.clear()
+        self.a.a = 4.0
+        self.assertTrue(self.is_dirty("Switch"))
+        self.assertEqual(self.pull(), 4.0)
+        self.assertEqual(executed, { "A" : 1, "Switch" : 1 })
+
+
+class StreamFramesTest(ExecutionTestCase):
+    def setUp(self):
+        super().setUp()
+        # Frame -> Sum <- Static
+        self.frame = self.tree.nodes.new("ExecutionFrameNode")
+        self.frame.name = "Frame"
+        self.frame.scale = 2.0
+        self.static = self.new_node("Static", 1.0, 2.0)
+        self.sum = self.new_node("Sum")
+        self.link(self.frame, self.sum, "a")
+        self.link(self.static, self.sum, "b")
+        self.plan = self.tree.execution_plan()
+
+    def test_frames(self):
+        frames = list(self.tree.evaluate_frames(range(1, 4)))
+        self.assertEqual(frames, [(frame, { ("Sum", "result") : frame * 2.0 + 3.0 }) for frame in range(1, 4)])
+        # static steps run once, varying steps per frame
+        self.assertEqual(executed, { "Static" : 1, "Frame" : 3, "Sum" : 3 })
+
+    def test_outputs(self):
+        frames = self.tree.evaluate_frames([5], outputs=[self.frame.outputs[0], self.static.outputs[0]])
+        self.assertEqual(list(frames), [(5, { ("Frame", "result") : 10.0, ("Static", "result") : 3.0 })])
+
+    def test_varying_steps(self):
+        self.assertEqual([self.plan.steps[i].name for i in self.plan.time_varying_steps()], ["Frame", "Sum"])
+
+    def test_dirty_after_streaming(self):
+        list(self.tree.evaluate_frames([1, 2]))
+        self.assertFalse(self.plan.dirty[self.plan.step_index["Static"]])
+        self.assertTrue(self.plan.dirty[self.plan.step_index["Frame"]])
+        self.assertTrue(self.plan.dirty[self.plan.step_index["Sum"]])
+
+        # regular evaluation doesn't see per frame values
+        executed.clear()
+        self.assertEqual(self.result(self.sum), 3.0)
+        self.assertEqual(executed, { "Frame" : 1, "Sum" : 1 })
+
+    def test_close_early(self):
+        frames = self.tree.evaluate_frames(range(100))
+        self.assertEqual(next(frames)[0], 0)
+        self.assertEqual(next(frames)[0], 1)
+        frames.close()
+        self.assertEqual(executed["Frame"], 2)
+        self.assertTrue(self.plan.dirty[self.plan.step_index["Frame"]])
+        self.assertTrue(self.plan.dirty[self.plan.step_index["Sum"]])
+        self.assertEqual(self.result(self.sum), 3.0)
+
+    def test_changed_between_streams(self):
+        list(self.tree.evaluate_frames([1]))
+        executed.clear()
+        self.static.a = 5.0
+        frames = list(self.tree.evaluate_frames([1]))
+        self.assertEqual(frames, [(1, { ("Sum", "result") : 9.0 })])
+        self.assertEqual(executed, { "Static" : 1, "Frame" : 1, "Sum" : 1 })
+
+
+class RenameTest(ExecutionTestCase):
+    def test_change_after_rename(self):
+        a = self.new_node("A", b=1.0)
+        b = self.new_node("B")
+        self.link(a, b)
+        self.assertEqual(self.result(b), 1.0)
+
+        a.name = "Renamed"
+        a.a = 10.0
+        self.assertEqual(self.result(b), 11.0)
+        self.assertEqual(self.result(a), 11.0)
+
+    def test_output_after_rename(self):
+        a = self.new_node("A", b=1.0)
+        b = self.new_node("B")
+        self.link(a, b)
+        self.tree.evaluate()
+
+        # the plan is not compiled again, the node is found by pointer
+        a.name = "Renamed"
+        plan = self.tree.execution_plan()
+        self.assertEqual(plan.output_value("Renamed", "result"), 1.0)
+        self.assertEqual(self.tree.evaluate_output(a.outputs[0]), 1.0)
+
+    def test_swapped_names(self):
+        a = self.new_node("A", a=1.0)
+        b = self.new_node("B", a=2.0)
+        plan = self.tree.evaluate()
+        a.name = "Temp"
+        b.name = "A"
+        a.name = "B"
+        self.assertEqual(plan.output_value("A", "result"), 2.0)
+        self.assertEqual(plan.output_value("B", "result"), 1.0)
+
+
+class CommonNodeTest(ExecutionTestCase):
+    def setUp(self):
+        executed.clear()
+        self.tree = bpy.data.node_groups.new("Execution", "ExecutionOptimizedTree")
+
+    def test_property_names(self):
+        self.assertEqual(ExecutionMathNode._node_property_names, ("operation",))
+        self.assertEqual(ExecutionAddNode._node_property_names, ())
+
+    def test_different_operation(self):
+        add = self.new_node("Add", 2.0, 3.0, bl_idname="ExecutionMathNode")
+        multiply = self.new_node("Multiply", 2.0, 3.0, bl_idname="ExecutionMathNode")
+        multiply.operation = 'MULTIPLY'
+        c = self.new_node("C")
+        self.link(add, c, "a")
+        self.link(multiply, c, "b")
+        c.is_output_node = True
+        self.assertNotIn("Multiply", self.tree.execution_plan().merged)
+        self.assertEqual(self.result(c), 11.0)
+
+    def test_same_operation(self):
+        a = self.new_node("A", 2.0, 3.0, bl_idname="ExecutionMathNode")
+        b = self.new_node("B", 2.0, 3.0, bl_idname="ExecutionMathNode")
+        c = self.new_node("C")
+        self.link(a, c, "a")
+        self.link(b, c, "b")
+        c.is_output_node = True
+        plan = self.tree.execution_plan()
+        self.assertEqual(plan.merged.get("B", None), plan.merged.get("A", "A"))
+        self.assertEqual(self.result(c), 10.0)
+
+class OptimizeTest(ExecutionTestCase):
+    def setUp(self):
+        executed.clear()
+        self.tree = bpy.data.node_groups.new("Execution", "ExecutionOptimizedTree")
+
+    def new_output(self, name, source):
+        node = self.tree.nodes.new("ExecutionOutputNode")
+        node.name = name
+        self.link(source, node, "value")
+        return node
+
+    def test_dead_nodes(self):
+        a = self.new_node("A", 1.0)
+        self.new_node("Unused", 2.0)
+        self.new_output("Output", a)
+        plan = self.tree.evaluate()
+        self.assertEqual(plan.report["dead"], 1)
+        self.assertNotIn("Unused", plan.step_index)
+        self.assertNotIn("Unused", executed)
+
+    def test_no_output_nodes(self):
+        self.new_node("A", 1.0)
+        self.new_node("B", 2.0)
+        plan = self.tree.evaluate()
+        self.assertEqual(plan.report["dead"], 0)
+        self.assertEqual(executed, { "A" : 1, "B" : 1 })
+
+    def test_folding(self):
+        # A -> B -> Output, A and B only depend on unlinked inputs
+        a = self.new_node("A", 1.0, 2.0)
+        b = self.new_node("B", b=10.0)
+        self.link(a, b)
+        output = self.new_output("Output", b)
+        plan = self.tree.execution_plan()
+        self.assertEqual(plan.report["folded"], 2)
+        self.assertEqual([step.name for step in plan.steps], ["Output"])
+        # folded while compiling
+        self.assertEqual(executed, { "A" : 1, "B" : 1 })
+
+        executed.clear()
+        self.assertEqual(self.result(output), 13.0)
+        self.assertEqual(plan.output_value("A", "result"), 3.0)
+        self.assertEqual(executed, { "Output" : 1 })
+
+    def test_partial_folding(self):
+        a = self.new_node("A", 1.0)
+        b = self.new_node("B", 2.0)
+        b.execute_pure = False
+        c = self.new_node("C")
+        self.link(a, c, "a")
+        self.link(b, c, "b")
+        self.new_output("Output", c)
+        plan = self.tree.execution_plan()
+        self.assertEqual(sorted(plan.folded), ["A"])
+        self.assertEqual([step.name for step in plan.steps], ["B", "C", "Output"])
+        self.assertEqual(self.result(c), 3.0)
+
+    def test_folded_input_changed(self):
+        a = self.new_node("A", 1.0)
+        b = self.new_node("B", b=1.0)
+        self.link(a, b)
+        output = self.new_output("Output", b)
+        plan = self.tree.evaluate()
+        self.assertEqual(self.result(output), 2.0)
+
+        # the plan is compiled and folded again
+        a.a = 5.0
+        new_plan = self.tree.evaluate()
+        self.assertIsNot(new_plan, plan)
+        self.assertEqual(new_plan.report["folded"], 2)
+        self.assertEqual(self.result(output), 6.0)
+
+    def test_folded_values_not_reused(self):
+        a = self.new_node("A", 1.0)
+        output = self.new_output("Output", a)
+        self.tree.evaluate()
+        executed.clear()
+        a.a = 2.0
+        self.assertEqual(self.result(output), 2.0)
+        self.assertEqual(executed, { "A" : 1, "Output" : 1 })
+
+
+class OutputCacheTest(ExecutionTestCase):
+    def test_different_operation(self):
+        # the cache is shared between trees, results are told apart by the operation
+        cache = OutputCache()
+        node = self.new_node("Math", 2.0, 3.0, bl_idname="ExecutionMathNode")
+        self.assertEqual(self.tree.evaluate(cache=cache).output_value("Math", "result"), 5.0)
+
+        other = bpy.data.node_groups.new("Other", "ExecutionTestTree")
+        try:
+            other_node = other.nodes.new("ExecutionMathNode")
+            other_node.name = "Math"
+            other_node.a = 2.0
+            other_node.b = 3.0
+            other_node.operation = 'MULTIPLY'
+            self.assertEqual(other.evaluate(cache=cache).output_value("Math", "result"), 6.0)
+            self.assertEqual(cache.hits, 0)
+
+            other_node.operation = 'ADD'
+            self.assertEqual(other.evaluate(cache=cache).output_value("Math", "result"), 5.0)
+            self.assertEqual(cache.hits, 1)
+        finally:
+            execution.free_plan(other)
+            bpy.data.node_groups.remove(other)
+
+
+class PlanLifetimeTest(ExecutionTestCase):
+    def test_removed_tree(self):
+        other = bpy.data.node_groups.new("Other", "ExecutionTestTree")
+        other.execution_plan()
+        key = other.as_pointer()
+        self.assertIn(key, execution._tree_plans)
+        bpy.data.node_groups.remove(other)
+        fake_bpy.scene_update()
+        self.assertNotIn(key, execution._tree_plans)
+        self.assertNotIn(key, execution._tree_revisions)
+
+    def test_undo(self):
+        self.new_node("A")
+        self.tree.evaluate()
+        fake_bpy.undo()
+        self.assertEqual(execution._tree_plans, {})
+
+    def test_reused_pointer(self):
+        # a different tree at the same address gets a new plan
+        plan = self.tree.execution_plan()
+        bpy.data.node_groups.rename(self.tree, "Other")
+        self.assertIsNot(self.tree.execution_plan(), plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""Headless tests of IDRef properties, using the fake_bpy stand-in.
+
+    python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+import fake_bpy
+
+bpy = fake_bpy.install()
+fake_bpy.load_framework()
+
+from pynodes_framework import base, idref
+
+
+class IDRefTestTree(bpy.types.NodeTree, base.NodeTree):
+    bl_idname = "IDRefTestTree"
+
+
+class IDRefTestNode(bpy.types.Node, base.Node):
+    bl_idname = "IDRefTestNode"
+    socket_type = base.PyNodesSocket
+
+    target = idref.IDRefProperty(name="Target")
+
+
+def setUpModule():
+    for cls in (IDRefTestTree, IDRefTestNode):
+        bpy.utils.register_class(cls)
+    base.register()
+
+def tearDownModule():
+    base.unregister()
+
+
+class IDRefTestCase(unittest.TestCase):
+    def setUp(self):
+        # IDs of other tests are removed without an update
+        idref.tag_ids_changed()
+        self.tree = bpy.data.node_groups.new("IDRef", "IDRefTestTree")
+        self.node = self.tree.nodes.new("IDRefTestNode")
+
+    def tearDown(self):
+        idref._stale_names.clear()
+        bpy.data.node_groups.remove(self.tree)
+        for obj in list(bpy.data.objects):
+            bpy.data.objects.remove(obj)
+
+
+class LookupIDTest(IDRefTestCase):
+    def lookups(self, name):
+        count = fake_bpy.stats["id_lookups"]
+        value = idref.lookup_id('OBJECT', name)
+        return value, fake_bpy.stats["id_lookups"] - count
+
+    def test_hit(self):
+        obj = bpy.data.objects.new("Cube")
+        self.assertEqual(self.lookups("Cube"), (obj, 1))
+        # cached until the generation changes
+        self.assertEqual(self.lookups("Cube"), (obj, 0))
+
+    def test_miss(self):
+        self.assertEqual(self.lookups("Missing"), (None, 1))
+        # misses are not cached, the ID may be added later
+        obj = bpy.data.objects.new("Missing")
+        self.assertEqual(self.lookups("Missing"), (obj, 1))
+
+    def test_empty_name(self):
+        self.assertEqual(self.lookups(""), (None, 0))
+
+    def test_renamed(self):
+        obj = bpy.data.objects.new("Cube")
+        idref.lookup_id('OBJECT', "Cube")
+        bpy.data.objects.rename(obj, "Sphere")
+        # caught by the name check before the generation changes
+        self.assertEqual(self.lookups("Cube"), (None, 1))
+        self.assertEqual(self.lookups("Sphere"), (obj, 1))
+
+    def test_generation(self):
+        obj = bpy.data.objects.new("Cube")
+        idref.lookup_id('OBJECT', "Cube")
+        idref.tag_ids_changed()
+        self.assertEqual(self.lookups("Cube"), (obj, 1))
+        self.assertEqual(self.lookups("Cube"), (obj, 0))
+
+    def test_replaced(self):
+        old = bpy.data.objects.new("Cube")
+        idref.lookup_id('OBJECT', "Cube")
+        bpy.data.objects.remove(old)
+        new = bpy.data.objects.new("Cube")
+        # the update handler starts a new generation
+        fake_bpy.scene_update()
+        self.assertIs(idref.lookup_id('OBJECT', "Cube"), new)
+
+    def test_undo(self):
+        # undo reallocates IDs like loading a file
+        bpy.data.objects.new("Cube")
+        idref.lookup_id('OBJECT', "Cube")
+        fake_bpy.undo()
+        self.assertEqual(self.lookups("Cube")[1], 1)
+
+    def test_resolve_idrefs(self):
+        obj = bpy.data.objects.new("Cube")
+        other = self.tree.nodes.new("IDRefTestNode")
+        self.node.target = obj
+        other["target__name__"] = "Missing"
+        result = self.tree.resolve_idrefs()
+        self.assertIs(result[(self.node, "target")], obj)
+        self.assertIsNone(result[(other, "target")])
+        # the lookups filled the cache
+        self.assertEqual(self.lookups("Cube"), (obj, 0))
+
+
+class StaleNameTest(IDRefTestCase):
+    def test_deferred_reset(self):
+        self.node["target__name__"] = "Missing"
+        # reading doesn't write, the name is reset by the update handler
+        self.assertIsNone(self.node.target)
+        self.assertEqual(self.node["target__name__"], "Missing")
+        fake_bpy.scene_update()
+        self.assertEqual(self.node["target__name__"], "")
+
+    def test_created_before_reset(self):
+        self.node["target__name__"] = "Late"
+        self.assertIsNone(self.node.target)
+        obj = bpy.data.objects.new("Late")
+        fake_bpy.scene_update()
+        self.assertEqual(self.node["target__name__"], "Late")
+        self.assertIs(self.node.target, obj)
+
+    def test_removed_node(self):
+        self.node["target__name__"] = "Missing"
+        self.node.target
+        self.tree.nodes.remove(self.node)
+        # the removed node is freed, the queued entry is resolved through the tree
+        fake_bpy.scene_update()
+        self.assertEqual(self.node["target__name__"], "Missing")
+
+    def test_load_discards_queue(self):
+        self.node["target__name__"] = "Missing"
+        self.node.target
+        self.assertTrue(idref._stale_names)
+        fake_bpy.undo()
+        self.assertFalse(idref._stale_names)
+        self.assertEqual(self.node["target__name__"], "Missing")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""Headless tests of coalesced interface updates, using the fake_bpy stand-in.
+
+    python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+import fake_bpy
+
+bpy = fake_bpy.install()
+fake_bpy.load_framework()
+
+from pynodes_framework import base, parameter
+
+
+# tree name -> number of update_interface calls
+interface_updates = {}
+
+class ParameterTestTree(bpy.types.NodeTree, base.NodeTree):
+    bl_idname = "ParameterTestTree"
+
+    def update_interface(self):
+        if self.get("removed", False):
+            raise ReferenceError("StructRNA of type ParameterTestTree has been removed")
+        interface_updates[self.name] = interface_updates.get(self.name, 0) + 1
+
+
+def setUpModule():
+    bpy.utils.register_class(ParameterTestTree)
+    base.register()
+
+def tearDownModule():
+    base.unregister()
+
+
+class InterfaceUpdateTest(unittest.TestCase):
+    def setUp(self):
+        parameter.flush_interface_updates()
+        fake_bpy.run_timers()
+        interface_updates.clear()
+        for key in parameter.interface_update_stats:
+            parameter.interface_update_stats[key] = 0
+        self.trees = [bpy.data.node_groups.new(name, "ParameterTestTree") for name in ("First", "Second")]
+
+    def tearDown(self):
+        for tree in self.trees:
+            bpy.data.node_groups.remove(tree)
+
+    def stats(self):
+        stats = parameter.interface_update_stats
+        return (stats["requested"], stats["flushed"], stats["suppressed"])
+
+    def test_batch(self):
+        first, second = self.trees
+        with parameter.batch_interface_updates():
+            for i in range(5):
+                parameter.request_interface_update(first)
+            parameter.request_interface_update(second)
+            self.assertEqual(interface_updates, {})
+        self.assertEqual(interface_updates, { "First" : 1, "Second" : 1 })
+        self.assertEqual(self.stats(), (6, 2, 4))
+
+    def test_nested(self):
+        first = self.trees[0]
+        with parameter.batch_interface_updates():
+            with parameter.batch_interface_updates():
+                parameter.request_interface_update(first)
+            # only the outermost block flushes
+            self.assertEqual(interface_updates, {})
+            parameter.request_interface_update(first)
+        self.assertEqual(interface_updates, { "First" : 1 })
+        self.assertEqual(self.stats(), (2, 1, 1))
+
+    def test_timer(self):
+        first = self.trees[0]
+        parameter.request_interface_update(first)
+        parameter.request_interface_update(first)
+        self.assertEqual(interface_updates, {})
+        self.assertEqual(bpy.app.timers.pending.count(parameter._interface_update_timer), 1)
+        fake_bpy.run_timers()
+        self.assertEqual(interface_updates, { "First" : 1 })
+        self.assertEqual(self.stats(), (2, 1, 1))
+
+    def test_after_flush(self):
+        # flushed trees are not suppressed anymore
+        first = self.trees[0]
+        with parameter.batch_interface_updates():
+            parameter.request_interface_update(first)
+        with parameter.batch_interface_updates():
+            parameter.request_interface_update(first)
+        self.assertEqual(interface_updates, { "First" : 2 })
+        self.assertEqual(self.stats(), (2, 2, 0))
+
+    def test_without_timers(self):
+        timers = bpy.app.timers
+        bpy.app.timers = None
+        try:
+            parameter.request_interface_update(self.trees[0])
+            self.assertEqual(interface_updates, { "First" : 1 })
+        finally:
+            bpy.app.timers = timers
+
+    def test_removed_tree(self):
+        first, second = self.trees
+        with parameter.batch_interface_updates():
+            parameter.request_interface_update(first)
+            parameter.request_interface_update(second)
+            first["removed"] = True
+        self.assertEqual(interface_updates, { "Second" : 1 })
+        self.assertEqual(self.stats(), (2, 1, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,216 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""Headless tests of the parallel scheduler, using the fake_bpy stand-in.
+
+    python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import threading
+import unittest
+
+# The math.py example next to the tests shadows the standard module, which
+# multiprocessing imports. Spawned workers get the same sys.path and still
+# need to find this module.
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path[:] = [path for path in sys.path if os.path.abspath(path or os.curdir) != tests_dir] + [tests_dir]
+sys.path.insert(0, os.path.join(os.path.dirname(tests_dir), "benchmarks"))
+import fake_bpy
+
+bpy = fake_bpy.install()
+fake_bpy.load_framework()
+
+from pynodes_framework import base, execution, scheduler
+from pynodes_framework.parameter import NodeParamFloat
+
+
+class SchedulerTestTree(bpy.types.NodeTree, base.NodeTree):
+    bl_idname = "SchedulerTestTree"
+
+
+# node name -> thread executing the node
+threads = {}
+
+class SchedulerThreadNode(bpy.types.Node, base.Node):
+    bl_idname = "SchedulerThreadNode"
+    socket_type = base.PyNodesSocket
+    execute_policy = 'THREAD'
+
+    a = NodeParamFloat("A")
+    b = NodeParamFloat("B")
+    result = NodeParamFloat("Result", is_output=True)
+
+    def execute(self, context, inputs):
+        threads[self.name] = threading.current_thread()
+        return {"result" : inputs["a"] + inputs["b"]}
+
+
+class SchedulerProcessNode(bpy.types.Node, base.Node):
+    bl_idname = "SchedulerProcessNode"
+    socket_type = base.PyNodesSocket
+    execute_policy = 'PROCESS'
+
+    a = NodeParamFloat("A")
+    b = NodeParamFloat("B")
+    result = NodeParamFloat("Result", is_output=True)
+    pid = NodeParamFloat("PID", is_output=True)
+
+    @staticmethod
+    def execute_process(inputs):
+        return {"result" : inputs["a"] * inputs["b"], "pid" : float(os.getpid())}
+
+
+class SchedulerMainNode(bpy.types.Node, base.Node):
+    bl_idname = "SchedulerMainNode"
+    socket_type = base.PyNodesSocket
+
+    a = NodeParamFloat("A")
+    b = NodeParamFloat("B")
+    result = NodeParamFloat("Result", is_output=True)
+
+    def execute(self, context, inputs):
+        threads[self.name] = threading.current_thread()
+        return {"result" : inputs["a"] - inputs["b"]}
+
+
+class SchedulerSwitchNode(bpy.types.Node, base.Node):
+    bl_idname = "SchedulerSwitchNode"
+    socket_type = base.PyNodesSocket
+    lazy_inputs = ("a", "b")
+
+    switch = NodeParamFloat("Switch")
+    a = NodeParamFloat("A")
+    b = NodeParamFloat("B")
+    result = NodeParamFloat("Result", is_output=True)
+
+    def execute(self, context, inputs):
+        threads[self.name] = threading.current_thread()
+        return {"result" : inputs["a"]() if inputs["switch"] else inputs["b"]()}
+
+
+def setUpModule():
+    for cls in (SchedulerTestTree, SchedulerThreadNode, SchedulerProcessNode, SchedulerMainNode, SchedulerSwitchNode):
+        bpy.utils.register_class(cls)
+    base.register()
+
+def tearDownModule():
+    base.unregister()
+
+
+class SchedulerTestCase(unittest.TestCase):
+    max_processes = 0
+
+    @classmethod
+    def setUpClass(cls):
+        cls.scheduler = scheduler.ParallelScheduler(max_workers=2, max_processes=cls.max_processes)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.scheduler.shutdown()
+
+    def setUp(self):
+        threads.clear()
+        self.tree = bpy.data.node_groups.new("Scheduler", "SchedulerTestTree")
+        # thread and process branches, combined on the main thread
+        self.thread_node = self.new_node("Thread", "SchedulerThreadNode", 2.0, 3.0)
+        self.process_node = self.new_node("Process", "SchedulerProcessNode", 2.0, 3.0)
+        self.main_node = self.new_node("Main", "SchedulerMainNode")
+        self.tree.links.new(self.thread_node.outputs[0], self.main_node.inputs[0])
+        self.tree.links.new(self.process_node.outputs[0], self.main_node.inputs[1])
+
+    def tearDown(self):
+        execution.free_plan(self.tree)
+        bpy.data.node_groups.remove(self.tree)
+
+    def new_node(self, name, bl_idname, a=0.0, b=0.0):
+        node = self.tree.nodes.new(bl_idname)
+        node.name = name
+        node.a = a
+        node.b = b
+        return node
+
+    def run_plan(self):
+        plan = self.tree.execution_plan()
+        self.scheduler.run(plan)
+        return plan
+
+
+class ThreadDispatchTest(SchedulerTestCase):
+    def test_results(self):
+        plan = self.run_plan()
+        self.assertEqual(plan.output_value("Thread", "result"), 5.0)
+        self.assertEqual(plan.output_value("Process", "result"), 6.0)
+        self.assertEqual(plan.output_value("Main", "result"), -1.0)
+        self.assertFalse(any(plan.dirty))
+
+    def test_policies(self):
+        plan = self.run_plan()
+        self.assertIsNot(threads["Thread"], threading.main_thread())
+        self.assertIs(threads["Main"], threading.main_thread())
+        # without a process pool, process nodes run on worker threads
+        self.assertEqual(plan.output_value("Process", "pid"), float(os.getpid()))
+
+    def test_dirty_only(self):
+        self.run_plan()
+        threads.clear()
+        self.thread_node.a = 4.0
+        plan = self.run_plan()
+        self.assertEqual(set(threads), {"Thread", "Main"})
+        self.assertEqual(plan.output_value("Main", "result"), 1.0)
+
+    def test_dirty_step_with_clean_consumer(self):
+        switch = self.tree.nodes.new("SchedulerSwitchNode")
+        switch.name = "Switch"
+        switch.switch = 1.0
+        self.tree.links.new(self.thread_node.outputs[0], switch.inputs["A"])
+        self.tree.links.new(self.process_node.outputs[0], switch.inputs["B"])
+        plan = self.tree.execution_plan()
+        # the pull leaves the process branch dirty and the switch clean
+        self.assertEqual(plan.pull("Switch", "result"), 5.0)
+        self.assertTrue(plan.dirty[plan.step_index["Process"]])
+        self.assertFalse(plan.dirty[plan.step_index["Switch"]])
+
+        threads.clear()
+        self.scheduler.run(plan)
+        self.assertFalse(any(plan.dirty))
+        self.assertNotIn("Switch", threads)
+        self.assertEqual(plan.output_value("Main", "result"), -1.0)
+
+
+# spawned workers start in the working directory, before getting sys.path
+@unittest.skipIf(os.path.abspath(os.curdir) == tests_dir, "workers would import the math.py example, run from the parent directory")
+class ProcessDispatchTest(SchedulerTestCase):
+    max_processes = 1
+
+    def test_spawn_context(self):
+        context = self.scheduler.process_pool._mp_context
+        self.assertEqual(context.get_start_method(), "spawn")
+
+    def test_results(self):
+        plan = self.run_plan()
+        self.assertNotEqual(plan.output_value("Process", "pid"), float(os.getpid()))
+        self.assertEqual(plan.output_value("Process", "result"), 6.0)
+        self.assertEqual(plan.output_value("Main", "result"), -1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""Headless tests of node tree serialization, using the fake_bpy stand-in.
+
+    python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import unittest
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+import fake_bpy
+
+bpy = fake_bpy.install()
+fake_bpy.load_framework()
+
+from pynodes_framework import base, serialize
+from pynodes_framework.parameter import NodeParamFloat, NodeParamVector
+
+
+class SerializeTestTree(bpy.types.NodeTree, base.NodeTree):
+    bl_idname = "SerializeTestTree"
+
+
+class SerializeTestNode(bpy.types.Node, base.Node):
+    bl_idname = "SerializeTestNode"
+    socket_type = base.PyNodesSocket
+
+    a = NodeParamFloat("A")
+    b = NodeParamFloat("B")
+    result = NodeParamFloat("Result", is_output=True)
+
+    def execute(self, context, inputs):
+        return {"result" : inputs["a"] + inputs["b"]}
+
+
+# parameter types are changed by the tests
+class SerializeChangedNode(bpy.types.Node, base.Node):
+    bl_idname = "SerializeChangedNode"
+    socket_type = base.PyNodesSocket
+
+    a = NodeParamFloat("A")
+    b = NodeParamFloat("B")
+
+
+def setUpModule():
+    for cls in (SerializeTestTree, SerializeTestNode, SerializeChangedNode):
+        bpy.utils.register_class(cls)
+    base.register()
+
+def tearDownModule():
+    base.unregister()
+
+
+class SerializeTest(unittest.TestCase):
+    def setUp(self):
+        self.tree = bpy.data.node_groups.new("Serialize", "SerializeTestTree")
+        first = self.tree.nodes.new("SerializeTestNode")
+        first.name = "First"
+        first.a = 1.0
+        first.b = 2.0
+        second = self.tree.nodes.new("SerializeTestNode")
+        second.name = "Second"
+        second.b = 4.0
+        self.tree.links.new(first.outputs[0], second.inputs[0])
+
+    def tearDown(self):
+        for tree in list(bpy.data.node_groups):
+            bpy.data.node_groups.remove(tree)
+
+    def test_round_trip(self):
+        copy = serialize.load_tree(serialize.dump_tree(self.tree), "Copy")
+        self.assertEqual([node.name for node in copy.nodes], ["First", "Second"])
+        self.assertEqual([(link.from_node.name, link.to_socket.identifier) for link in copy.links], [("First", "a")])
+        self.assertEqual(copy.evaluate().output_value("Second", "result"), 7.0)
+
+    def test_unregistered_type(self):
+        data = serialize.dump_tree(self.tree)
+        bpy.utils.unregister_class(SerializeTestNode)
+        try:
+            with self.assertRaises(serialize.SerializationError):
+                serialize.load_tree(data, "Copy")
+        finally:
+            bpy.utils.register_class(SerializeTestNode)
+        # no empty tree is left behind
+        self.assertEqual(len(bpy.data.node_groups), 1)
+
+    def test_changed_parameter_type(self):
+        node = self.tree.nodes.new("SerializeChangedNode")
+        node.name = "Changed"
+        node.a = 1.0
+        node.b = 2.0
+        data = serialize.dump_tree(self.tree)
+        SerializeChangedNode.a = NodeParamVector("A")
+        copy = serialize.load_tree(data, "Copy")
+        # the value of the changed parameter is skipped, the others are kept
+        self.assertEqual(list(copy.nodes["Changed"].a), [0.0, 0.0, 0.0])
+        self.assertEqual(copy.nodes["Changed"].b, 2.0)
+        self.assertEqual(copy.evaluate().output_value("Second", "result"), 7.0)
+
+    def test_corrupt_data(self):
+        data = serialize.dump_tree(self.tree)
+        header = data[:serialize._header.size]
+        for corrupt in (data[:-8], header + b"garbage", header + zlib.compress(b"{not json"), header + zlib.compress(b"[]")):
+            with self.assertRaises(serialize.SerializationError):
+                serialize.load_tree(corrupt, "Copy")
+        self.assertEqual(len(bpy.data.node_groups), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,266 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""Headless tests of the incremental node order, using the fake_bpy stand-in.
+
+    python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+import fake_bpy
+
+bpy = fake_bpy.install()
+fake_bpy.load_framework()
+
+from pynodes_framework import base, execution, topology
+from pynodes_framework.parameter import NodeParamFloat
+
+
+class TopologyTestTree(bpy.types.NodeTree, base.NodeTree):
+    bl_idname = "TopologyTestTree"
+
+
+class TopologyTestNode(bpy.types.Node, base.Node):
+    bl_idname = "TopologyTestNode"
+    socket_type = base.PyNodesSocket
+
+    value = NodeParamFloat("Value")
+    other = NodeParamFloat("Other")
+    result = NodeParamFloat("Result", is_output=True)
+
+    def execute(self, context, inputs):
+        return {"result" : inputs["value"] + inputs["other"] + 1.0}
+
+
+def setUpModule():
+    for cls in (TopologyTestTree, TopologyTestNode):
+        bpy.utils.register_class(cls)
+    base.register()
+
+def tearDownModule():
+    base.unregister()
+
+
+def pseudo_random(seed):
+    # random imports math, which is shadowed by the math.py example in this directory
+    while True:
+        seed = (seed * 1103515245 + 12345) % 2147483648
+        yield seed >> 8
+
+
+def has_path(tree, from_node, to_node):
+    pending = [from_node]
+    visited = set()
+    while pending:
+        node = pending.pop()
+        if node is to_node:
+            return True
+        if node not in visited:
+            visited.add(node)
+            pending.extend(link.to_node for link in tree.links if link.from_node is node)
+    return False
+
+
+class TreeTopologyTest(unittest.TestCase):
+    def setUp(self):
+        self.tree = bpy.data.node_groups.new("Topology", "TopologyTestTree")
+
+    def tearDown(self):
+        bpy.data.node_groups.remove(self.tree)
+
+    def new_nodes(self, *names):
+        nodes = []
+        for name in names:
+            node = self.tree.nodes.new("TopologyTestNode")
+            node.name = name
+            nodes.append(node)
+        return nodes
+
+    def link(self, from_node, to_node, index=0):
+        return self.tree.links.new(from_node.outputs[0], to_node.inputs[index])
+
+    def topology(self):
+        return topology.get_topology(self.tree, execution.tree_revision(self.tree))
+
+    def assertOrderValid(self):
+        topo = self.topology()
+        self.assertIsNotNone(topo)
+        position = topo.order.position
+        self.assertEqual(set(position), { node.name for node in self.tree.nodes })
+        for link in self.tree.links:
+            self.assertLess(position[link.from_node.name], position[link.to_node.name],
+                            "%s -> %s" % (link.from_node.name, link.to_node.name))
+        nodes, sources = execution.tree_dependencies(self.tree)
+        self.assertIsNotNone(execution.maintained_order(self.tree, nodes, sources))
+
+    def result(self, node):
+        return self.tree.evaluate().output_value(node.name, "result")
+
+    def test_append(self):
+        a, b, c = self.new_nodes("A", "B", "C")
+        self.link(b, c)
+        self.link(a, b)
+        self.assertOrderValid()
+        self.assertEqual(self.result(c), 3.0)
+
+    def test_insert_on_link(self):
+        b, a, c = self.new_nodes("B", "A", "C")
+        self.link(a, c)
+        self.assertOrderValid()
+        # node dropped on a link: one link replaced by two in one update
+        with self.tree.batch_update():
+            self.tree.links.remove(self.tree.links[0])
+            self.link(a, b)
+            self.link(b, c)
+        self.assertOrderValid()
+        self.assertEqual(self.result(c), 3.0)
+
+    def test_insert_on_last_link(self):
+        b, a, c, d = self.new_nodes("B", "A", "C", "D")
+        self.link(c, d)
+        self.link(a, c)
+        with self.tree.batch_update():
+            self.tree.links.remove(self.tree.links[1])
+            self.link(a, b)
+            self.link(b, c)
+        self.assertOrderValid()
+        self.assertEqual(self.result(d), 4.0)
+
+    def test_reroute_insert(self):
+        c, a = self.new_nodes("C", "A")
+        self.link(a, c)
+        # shift-drag on a link adds a reroute node in the same update
+        with self.tree.batch_update():
+            reroute = self.tree.nodes.new("NodeReroute")
+            self.tree.links.remove(self.tree.links[0])
+            self.tree.links.new(a.outputs[0], reroute.inputs[0])
+            self.tree.links.new(reroute.outputs[0], c.inputs[0])
+        self.assertOrderValid()
+        self.assertEqual(self.result(c), 2.0)
+
+        # node dropped on the link behind the reroute
+        with self.tree.batch_update():
+            b = self.tree.nodes.new("TopologyTestNode")
+            self.tree.links.remove(self.tree.links[1])
+            self.tree.links.new(reroute.outputs[0], b.inputs[0])
+            self.link(b, c)
+        self.assertOrderValid()
+        self.assertEqual(self.result(c), 3.0)
+
+    def test_rejected_cycle(self):
+        a, b, c = self.new_nodes("A", "B", "C")
+        self.link(a, b)
+        self.link(b, c)
+        self.link(c, a)
+        self.link(c, c, 1)
+        self.assertEqual([(link.from_node, link.to_node) for link in self.tree.links], [(a, b), (b, c)])
+        self.assertOrderValid()
+
+        # cycle created by one of several links added in one update
+        d, = self.new_nodes("D")
+        with self.tree.batch_update():
+            self.link(c, d)
+            self.link(d, b, 1)
+        self.assertEqual([(link.from_node, link.to_node) for link in self.tree.links], [(a, b), (b, c), (c, d)])
+        self.assertOrderValid()
+        self.assertEqual(self.result(d), 4.0)
+
+    def test_remove_links(self):
+        a, b, c = self.new_nodes("A", "B", "C")
+        self.link(a, b)
+        self.link(b, c)
+        self.link(a, c, 1)
+        self.tree.links.remove(self.tree.links[0])
+        # removed links are only counted, not compared
+        self.assertEqual(self.topology().stale, 1)
+        self.assertOrderValid()
+        self.assertEqual(self.result(c), 3.0)
+
+        # removing the last link
+        self.tree.links.remove(self.tree.links[-1])
+        self.assertOrderValid()
+        self.assertEqual(self.result(c), 2.0)
+
+    def test_cycle_through_removed_link(self):
+        a, b, c = self.new_nodes("A", "B", "C")
+        self.link(a, b)
+        self.link(b, c)
+        self.tree.links.remove(self.tree.links[0])
+        self.link(c, a)
+        self.assertEqual([(link.from_node, link.to_node) for link in self.tree.links], [(b, c), (c, a)])
+        self.assertOrderValid()
+        self.assertEqual(self.topology().stale, 0)
+        self.assertEqual(self.result(a), 3.0)
+
+    def test_replace_link(self):
+        a, b, c = self.new_nodes("A", "B", "C")
+        self.link(a, c)
+        # relinking an occupied input removes the existing link
+        self.link(b, c)
+        self.link(c, a)
+        self.assertEqual([(link.from_node, link.to_node) for link in self.tree.links], [(b, c), (c, a)])
+        self.assertOrderValid()
+        self.assertEqual(self.result(a), 3.0)
+
+    def test_remove_nodes(self):
+        a, b, c = self.new_nodes("A", "B", "C")
+        self.link(a, b)
+        self.link(b, c)
+        self.tree.nodes.remove(b)
+        self.assertOrderValid()
+        # links of the removed node don't constrain a new node of the same name
+        b, = self.new_nodes("B")
+        self.link(c, b)
+        self.link(b, a)
+        self.assertEqual(len(self.tree.links), 2)
+        self.assertOrderValid()
+        self.assertEqual(self.result(a), 3.0)
+
+    def test_random_edits(self):
+        numbers = pseudo_random(7)
+        def choice(items):
+            return items[next(numbers) % len(items)]
+
+        nodes = list(self.new_nodes(*("N%d" % i for i in range(12))))
+        for step in range(400):
+            with self.tree.batch_update():
+                for edit in range(1 + next(numbers) % 3):
+                    kind = next(numbers) % 20
+                    if kind < 10 or not self.tree.links:
+                        from_node, to_node = choice(nodes), choice(nodes)
+                        self.link(from_node, to_node, next(numbers) % 2)
+                    elif kind < 18:
+                        self.tree.links.remove(choice(list(self.tree.links)))
+                    elif kind < 19 and len(nodes) > 2:
+                        node = choice(nodes)
+                        nodes.remove(node)
+                        self.tree.nodes.remove(node)
+                    else:
+                        nodes.extend(self.new_nodes("N%d" % (12 + step)))
+            for link in self.tree.links:
+                self.assertFalse(has_path(self.tree, link.to_node, link.from_node))
+            self.assertOrderValid()
+
+if __name__ == "__main__":
+    unittest.main()
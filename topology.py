@@ -0,0 +1,379 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""Incremental topological order of node trees.
+
+The order is maintained with the online algorithm of Pearce and Kelly:
+adding a link only reorders the nodes between its two ends, and a link that
+would create a cycle is detected while searching that region. Removing links
+never invalidates the order.
+
+NodeTree.update calls update_topology, which applies the node and link
+changes since the last update and removes the links that would create a cycle.
+Nodes and links are added at the end of the tree collections, new ones are
+found after the previous last link. Removed links are only counted and stay in
+the order, until a new link seems to create a cycle or too many have been
+removed. Other changes are found by comparing all node names and links, which
+doesn't need sorting.
+"""
+
+from collections import deque
+
+
+class NodeTreeCycleError(Exception):
+    """The node tree contains a dependency cycle"""
+    pass
+
+
+class IncrementalTopologicalOrder():
+    """Topological order of a graph, updated as nodes and edges are added and removed"""
+
+    def __init__(self):
+        self.position = {} # node -> index in nodes
+        self.nodes = [] # nodes by position, None for removed nodes
+        self.successors = {} # node -> {successor : edge count}
+        self.predecessors = {} # node -> {predecessor : edge count}
+        self._holes = 0
+
+    def __len__(self):
+        return len(self.position)
+
+    def __contains__(self, node):
+        return node in self.position
+
+    def order(self):
+        """Nodes in topological order"""
+        return [node for node in self.nodes if node is not None]
+
+    def add_node(self, node):
+        """Add a node at the end of the order"""
+        self.position[node] = len(self.nodes)
+        self.nodes.append(node)
+        self.successors[node] = {}
+        self.predecessors[node] = {}
+
+    def remove_node(self, node):
+        """Remove a node and all its edges"""
+        for succ in self.successors.pop(node):
+            del self.predecessors[succ][node]
+        for pred in self.predecessors.pop(node):
+            del self.successors[pred][node]
+        self.nodes[self.position.pop(node)] = None
+
+        # compact when half of the positions are unused
+        self._holes += 1
+        if self._holes * 2 > len(self.nodes):
+            self.nodes = self.order()
+            self.position = { node : i for i, node in enumerate(self.nodes) }
+            self._holes = 0
+
+    def add_edge(self, from_node, to_node):
+        """Add an edge, raises NodeTreeCycleError if it would create a cycle"""
+        if from_node == to_node:
+            raise NodeTreeCycleError("Link from %r to itself" % (from_node,))
+        succ = self.successors[from_node]
+        if to_node in succ:
+            succ[to_node] += 1
+            self.predecessors[to_node][from_node] += 1
+            return
+
+        lower = self.position[to_node]
+        upper = self.position[from_node]
+        if lower < upper:
+            # affected region: nodes between the edge ends reachable from to_node,
+            # and nodes between them that from_node is reachable from
+            forward = self._search(to_node, self.successors, lambda p: p < upper, from_node)
+            backward = self._search(from_node, self.predecessors, lambda p: p > lower, None)
+            self._reorder(backward, forward)
+
+        succ[to_node] = 1
+        self.predecessors[to_node][from_node] = 1
+
+    def remove_edge(self, from_node, to_node):
+        succ = self.successors[from_node]
+        count = succ[to_node] - 1
+        if count:
+            succ[to_node] = count
+            self.predecessors[to_node][from_node] = count
+        else:
+            del succ[to_node]
+            del self.predecessors[to_node][from_node]
+
+    def _search(self, start, edges, in_region, target):
+        position = self.position
+        visited = { start }
+        pending = [start]
+        while pending:
+            node = pending.pop()
+            for other in edges[node]:
+                if other == target:
+                    raise NodeTreeCycleError("Link from %r to %r creates a cycle" % (target, start))
+                if other not in visited and in_region(position[other]):
+                    visited.add(other)
+                    pending.append(other)
+        return visited
+
+    def _reorder(self, backward, forward):
+        # backward nodes go before forward nodes, reusing the positions of both sets
+        position = self.position
+        backward = sorted(backward, key=position.get)
+        forward = sorted(forward, key=position.get)
+        slots = sorted(position[node] for node in backward + forward)
+        for node, slot in zip(backward + forward, slots):
+            position[node] = slot
+            self.nodes[slot] = node
+
+
+def _initial_order(names, edges):
+    # Kahn's algorithm for the first build, nodes in cycles are appended in tree order
+    pending = { name : 0 for name in names }
+    successors = { name : [] for name in names }
+    for from_name, to_name in edges:
+        successors[from_name].append(to_name)
+        pending[to_name] += 1
+    ready = deque(name for name in names if not pending[name])
+    result = []
+    while ready:
+        name = ready.popleft()
+        result.append(name)
+        for succ in successors[name]:
+            pending[succ] -= 1
+            if not pending[succ]:
+                ready.append(succ)
+    sorted_names = set(result)
+    result.extend(name for name in names if name not in sorted_names)
+    return result
+
+
+class TreeTopology():
+    """Incremental order of the nodes of a tree and the links it was built from"""
+
+    def __init__(self):
+        self.order = IncrementalTopologicalOrder()
+        # (from node, from socket, to node, to socket) identifiers of links in the order,
+        # may include removed links until the next full comparison
+        self.links = set()
+        # links that formed cycles when the order was first built, kept out of the order
+        self.cyclic = set()
+        # number of removed links still in the order
+        self.stale = 0
+        # collection lengths and keys of the last links after the last update
+        self.node_count = 0
+        self.link_count = 0
+        self.tail = []
+        self.initialized = False
+        self.resync = False
+        self.removing = False
+        self.revision = None
+
+    def is_valid(self):
+        return not self.cyclic
+
+    def update(self, tree):
+        """Apply changes since the last update, returns links that would create a cycle"""
+        rejected = None
+        if self.initialized and not self.resync and not self.cyclic and self.stale <= len(self.links) // 4 + _max_stale:
+            rejected = self._update_tail(tree)
+        if rejected is None:
+            rejected = self._update_full(tree)
+
+        links = tree.links
+        self.node_count = len(tree.nodes)
+        self.link_count = len(links) - len(rejected)
+        self.tail = []
+        index = len(links) - 1
+        while index >= 0 and len(self.tail) < _max_tail:
+            if links[index] not in rejected:
+                self.tail.append(_link_key(links[index]))
+            index -= 1
+        return rejected
+
+    def _update_full(self, tree):
+        # update doesn't tell what changed, compare with all nodes and links
+        names = [node.name for node in tree.nodes]
+        current = { _link_key(link) : link for link in tree.links }
+
+        order = self.order
+        if not self.initialized:
+            self.order = order = IncrementalTopologicalOrder()
+            self.links = set()
+            for name in _initial_order(names, [(key[0], key[2]) for key in current]):
+                order.add_node(name)
+            # existing links are never rejected, those forming cycles stay in the tree
+            self.cyclic = set(current)
+            self.initialized = True
+        else:
+            name_set = set(names)
+            for name in [name for name in order.position if name not in name_set]:
+                order.remove_node(name)
+            for name in names:
+                if name not in order:
+                    order.add_node(name)
+
+        for key in self.links.difference(current):
+            if key[0] in order and key[2] in order:
+                order.remove_edge(key[0], key[2])
+        self.links.intersection_update(current)
+        self.stale = 0
+        self.resync = False
+
+        links = set(current)
+        self.cyclic.intersection_update(links)
+        # links are added in tree order, later links are rejected when they form a cycle
+        for key in [key for key in current if key in self.cyclic]:
+            try:
+                order.add_edge(key[0], key[2])
+            except NodeTreeCycleError:
+                links.discard(key)
+            else:
+                self.cyclic.discard(key)
+                self.links.add(key)
+
+        rejected = []
+        for key in [key for key in current if key not in self.links and key not in self.cyclic]:
+            try:
+                order.add_edge(key[0], key[2])
+            except NodeTreeCycleError:
+                rejected.append(current[key])
+                links.discard(key)
+        self.links = links
+        return rejected
+
+    def _update_tail(self, tree):
+        # Nodes and links are added at the end of the tree collections, so new ones
+        # are the unknown entries at the end. Removed links are only counted, their
+        # edges stay in the order until the next full comparison: extra edges keep
+        # the order valid, but may make a new link look like a cycle.
+        # Returns None if changes can't be found this way.
+        order = self.order
+        nodes, links = tree.nodes, tree.links
+        node_count, link_count = len(nodes), len(links)
+
+        # removed or renamed nodes need a full comparison
+        added_nodes = node_count - self.node_count
+        if not 0 <= added_nodes <= _max_tail:
+            return None
+        names = [nodes[i].name for i in range(node_count - added_nodes, node_count)]
+        if any(name in order for name in names) or len(set(names)) != added_nodes:
+            return None
+        if node_count > added_nodes and nodes[node_count - added_nodes - 1].name not in order:
+            return None
+
+        # new links follow the last known link, which must be one of the previous
+        # last links, the rest of the count change are removals
+        added = []
+        index = link_count - 1
+        while index >= 0:
+            link = links[index]
+            key = _link_key(link)
+            if key in self.links:
+                break
+            if len(added) == _max_tail:
+                return None
+            added.append((key, link))
+            index -= 1
+        if index >= 0:
+            if key not in self.tail:
+                return None
+            # previous last links after it were removed
+            dropped = self.tail.index(key)
+        elif len(self.tail) == self.link_count:
+            dropped = self.link_count
+        else:
+            return None
+        added.reverse()
+        removed = len(added) - (link_count - self.link_count)
+        if removed < dropped or len({ key for key, link in added }) != len(added):
+            return None
+        name_set = set(names)
+        for key, link in added:
+            if not (key[0] in order or key[0] in name_set) or not (key[2] in order or key[2] in name_set):
+                return None
+
+        for name in names:
+            order.add_node(name)
+        self.stale += removed
+        rejected = []
+        for key, link in added:
+            try:
+                order.add_edge(key[0], key[2])
+            except NodeTreeCycleError:
+                if self.stale:
+                    # the cycle may go through a removed link
+                    return None
+                rejected.append(link)
+            else:
+                self.links.add(key)
+        return rejected
+
+
+# Most nodes or links added in one update before comparing all of them
+_max_tail = 8
+# Removed links kept in the order, in addition to a quarter of all links
+_max_stale = 64
+
+
+def _link_key(link):
+    return (link.from_node.name, link.from_socket.identifier, link.to_node.name, link.to_socket.identifier)
+
+
+# Topologies by tree pointer
+_tree_topologies = {}
+
+def update_topology(tree, revision=None):
+    """Update the incremental order of a tree and remove links that would create a cycle.
+
+    revision is the tree revision the order is in sync with afterwards.
+    Returns the removed links.
+    """
+    topology = _tree_topologies.get(tree.as_pointer(), None)
+    if topology is None:
+        topology = _tree_topologies[tree.as_pointer()] = TreeTopology()
+    if topology.removing:
+        # update while removing rejected links, the order already leaves them out
+        topology.revision = revision
+        return []
+    rejected = topology.update(tree)
+    topology.revision = revision
+    topology.removing = True
+    try:
+        for link in rejected:
+            tree.links.remove(link)
+    finally:
+        topology.removing = False
+    return rejected
+
+def get_topology(tree, revision=None):
+    """Topology of a tree if it is acyclic and in sync with the given tree revision, else None"""
+    topology = _tree_topologies.get(tree.as_pointer(), None)
+    if topology is None or topology.revision != revision or not topology.is_valid():
+        return None
+    return topology
+
+def free_topology(tree):
+    _tree_topologies.pop(tree.as_pointer(), None)
+
+def free_all_topologies():
+    _tree_topologies.clear()
+
+def free_removed_topologies(pointers):
+    """Free topologies of all trees whose pointer is not in pointers"""
+    for key in [key for key in _tree_topologies if key not in pointers]:
+        del _tree_topologies[key]